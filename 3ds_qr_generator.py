@@ -1,26 +1,2688 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+import tkinter.font
 import qrcode
-from PIL import Image, ImageTk
+import qrcode.util
+from PIL import Image, ImageTk, ImageDraw, ImageFont
 import os
+import sys
+import argparse
 import requests
-from bs4 import BeautifulSoup
 import webbrowser
 import http.server
 import socketserver
 import threading
 import socket
+import time
+import itertools
+import io
+import mmap
+import queue
+import codecs
+import json
+import sqlite3
+import copy
+import struct
+import functools
+import hashlib
+import bisect
+import html
+import shutil
+import tempfile
+import urllib.parse
+import ipaddress
+from collections import OrderedDict
+from concurrent.futures import (
+    ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+)
+from html.parser import HTMLParser
+import re
+from collections import deque
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+
+# Taille des blocs envoyés aux clients
+COPY_BUFSIZE = 1024 * 1024
+# Transferts du serveur local : taille sous laquelle un fichier est prioritaire,
+# poids de sa part de débit et durée d'envoi visée pour un bloc (secondes)
+SMALL_FILE_BYTES = 32 * 1024 * 1024
+SMALL_FILE_WEIGHT = 4
+PACE_INTERVAL = 0.1
+# Requêtes gardées dans le journal du serveur local (/_stats)
+METRICS_HISTORY = 1000
+# Taille des blocs envoyés par sendfile (le noyau copie directement fichier -> socket)
+SENDFILE_CHUNK = 8 * 1024 * 1024
+# Délai avant de fermer une connexion keep-alive inactive (secondes)
+IDLE_TIMEOUT = 15
+# Nombre de jeux envoyés à l'interface à la fois pendant un chargement distant
+REMOTE_BATCH_SIZE = 200
+# Taille des blocs lus depuis un index distant
+INDEX_CHUNK_SIZE = 64 * 1024
+# Délai entre la dernière frappe et la recherche (ms)
+SEARCH_DEBOUNCE_MS = 120
+# Marge blanche autour du QR code (en modules)
+QR_BORDER = 4
+# Niveaux de correction d'erreur proposés
+QR_ERROR_LEVELS = {
+    "L": qrcode.constants.ERROR_CORRECT_L,
+    "M": qrcode.constants.ERROR_CORRECT_M,
+    "Q": qrcode.constants.ERROR_CORRECT_Q,
+    "H": qrcode.constants.ERROR_CORRECT_H,
+}
+# Version QR maximale d'un lot d'URLs (au-delà la 3DS scanne mal)
+QR_BUNDLE_MAX_VERSION = 10
+# Nombre d'images QR gardées prêtes à afficher (URL, taille)
+QR_PHOTO_CACHE_SIZE = 16
+# Planches de QR codes : A4 à 300 dpi, 4 x 5 codes par page
+SHEET_PAGE_SIZE = (2480, 3508)
+SHEET_COLUMNS = 4
+SHEET_ROWS = 5
+SHEET_MARGIN = 120
+# Fréquence de lecture des résultats des threads de travail (ms)
+UI_POLL_MS = 50
+# Vérification des liens (HEAD) : requêtes simultanées et durée de validité du cache
+PROBE_WORKERS = 8
+PROBE_TTL = 6 * 3600
+# Régions des codes produit (dernière lettre de CTR-P-XXXR)
+PRODUCT_REGIONS = {
+    'E': 'USA', 'J': 'JPN', 'K': 'KOR', 'C': 'CHN', 'W': 'TWN', 'A': 'Region Free',
+    'P': 'EUR', 'D': 'EUR', 'F': 'EUR', 'S': 'EUR', 'I': 'EUR', 'H': 'EUR',
+    'U': 'EUR', 'R': 'EUR', 'X': 'EUR', 'Y': 'EUR', 'Z': 'EUR',
+}
+# Bits de verrouillage régional du SMDH : JPN, USA, EUR, AUS, CHN, KOR, TWN
+SMDH_REGIONS = ('JPN', 'USA', 'EUR', 'EUR', 'CHN', 'KOR', 'TWN')
+# Unité des tailles et positions dans les en-têtes NCSD/NCCH
+MEDIA_UNIT = 0x200
+# Fichiers de jeux reconnus : nom, extension (motif précompilé, une seule passe)
+GAME_EXTENSIONS = ('.cia', '.3ds', '.3dsx')
+GAME_FILE_RE = re.compile(r"^(.*)\.(cia|3dsx|3ds)$", re.IGNORECASE | re.DOTALL)
+NAME_SEPARATORS = str.maketrans('_-', '  ')
+# Région devinée d'après le nom (en majuscules), dans l'ordre de priorité
+REGION_PATTERNS = (
+    ('USA', re.compile(r"USA")),
+    ('EUR', re.compile(r"EUR")),
+    ('JPN', re.compile(r"JPN|JAPAN")),
+)
+# Exploration des sous-dossiers d'un index : profondeur, pages lues en même temps,
+# requêtes simultanées et délai minimal (secondes) par hôte
+CRAWL_MAX_DEPTH = 3
+CRAWL_WORKERS = 8
+CRAWL_PER_HOST = 4
+CRAWL_DELAY = 0.02
+# Sources chargées en même temps par "load all"
+AGGREGATE_WORKERS = 4
+# Intervalle de vérification des interfaces réseau (ms)
+NETWORK_CHECK_MS = 30000
+# Intervalle de surveillance du dossier local (secondes)
+WATCH_INTERVAL = 1.0
+# Taille des blocs d'une copie en arrière-plan
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+# Attente maximale des en-têtes du serveur distant pour le cache LAN (secondes)
+PROXY_HEADERS_TIMEOUT = 60
+# Erreurs pour lesquelles un catalogue distant est repris du cache (serveur injoignable)
+OFFLINE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+# En-tête Range accepté : une seule plage "bytes=debut-fin", "debut-" ou "-suffixe"
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+class Transfer:
+    """Suivi d'un transfert en cours vers un client"""
+    def __init__(self, transfer_id, client, path, size=None, file_size=None):
+        self.id = transfer_id
+        self.client = client
+        self.path = path
+        # Octets à envoyer (une plage Range) et taille du fichier entier
+        self.size = size
+        self.file_size = file_size if file_size is not None else size
+        self.sent = 0
+        self.started = time.monotonic()
+        self.finished = None
+        # Heure à laquelle le prochain bloc peut partir (débit limité)
+        self.ready_at = self.started
+    
+    @property
+    def duration(self):
+        end = self.finished if self.finished is not None else time.monotonic()
+        return max(end - self.started, 1e-6)
+    
+    @property
+    def throughput(self):
+        """Débit moyen en octets par seconde"""
+        return self.sent / self.duration
+
+class TransferScheduler:
+    """Partage de la bande passante du serveur local entre les téléchargements
+    
+    Chaque transfert est cadencé à sa part du débit global (partagé entre les
+    transferts actifs) et du débit par client (partagé entre ses transferts).
+    Les petits fichiers (.3dsx, petits CIA) restent soumis aux limites mais
+    pèsent small_weight fois plus dans le partage, pour finir vite. Une limite
+    à 0 veut dire illimité.
+    """
+    def __init__(self, global_rate=0, client_rate=0, max_per_client=0,
+                 small_file=SMALL_FILE_BYTES, small_weight=SMALL_FILE_WEIGHT):
+        self.lock = threading.Lock()
+        self.global_rate = global_rate
+        self.client_rate = client_rate
+        self.max_per_client = max_per_client
+        self.small_file = small_file
+        self.small_weight = small_weight
+        self.active = {}
+        self.connections = {}
+    
+    def configure(self, global_rate, client_rate, max_per_client):
+        with self.lock:
+            self.global_rate = max(0, global_rate)
+            self.client_rate = max(0, client_rate)
+            self.max_per_client = max(0, max_per_client)
+    
+    def open_connection(self, client):
+        """Compte une connexion ; False si le client en a déjà trop"""
+        with self.lock:
+            count = self.connections.get(client, 0)
+            if self.max_per_client and count >= self.max_per_client:
+                return False
+            self.connections[client] = count + 1
+            return True
+    
+    def close_connection(self, client):
+        with self.lock:
+            count = self.connections.get(client, 0) - 1
+            if count > 0:
+                self.connections[client] = count
+            else:
+                self.connections.pop(client, None)
+    
+    def weight(self, transfer):
+        """Poids dans le partage, d'après la taille du fichier entier (pas de la plage)"""
+        if transfer.file_size is not None and transfer.file_size <= self.small_file:
+            return self.small_weight
+        return 1
+    
+    def register(self, transfer):
+        with self.lock:
+            self.active[transfer.id] = transfer
+    
+    def unregister(self, transfer):
+        with self.lock:
+            self.active.pop(transfer.id, None)
+    
+    def rate(self, transfer):
+        """Débit alloué au transfert en octets par seconde (None : pas de limite)"""
+        with self.lock:
+            if transfer.id not in self.active:
+                return None
+            rates = []
+            weight = self.weight(transfer)
+            if self.global_rate:
+                total = sum(self.weight(t) for t in self.active.values())
+                rates.append(self.global_rate * weight / total)
+            if self.client_rate:
+                same_client = sum(self.weight(t) for t in self.active.values()
+                                  if t.client == transfer.client)
+                rates.append(self.client_rate * weight / same_client)
+        return min(rates) if rates else None
+    
+    def chunk_size(self, transfer, default):
+        """Taille du prochain bloc : environ PACE_INTERVAL secondes de débit alloué"""
+        rate = self.rate(transfer)
+        if rate is None:
+            return default
+        return max(64 * 1024, min(default, int(rate * PACE_INTERVAL)))
+    
+    def pace(self, transfer, sent):
+        """Attend le temps que prennent les octets envoyés au débit alloué"""
+        rate = self.rate(transfer)
+        if rate is None:
+            return
+        now = time.monotonic()
+        transfer.ready_at = max(transfer.ready_at, now) + sent / rate
+        if transfer.ready_at > now:
+            time.sleep(transfer.ready_at - now)
+
+class ServerMetrics:
+    """Compteurs du serveur local et journal des dernières requêtes
+    
+    Chaque requête terminée coûte un ajout dans une deque bornée et quelques
+    additions sous verrou ; les percentiles ne sont calculés qu'à la lecture.
+    """
+    def __init__(self, history=METRICS_HISTORY):
+        self.lock = threading.Lock()
+        # (heure, client, requête, statut, octets, durée)
+        self.recent = deque(maxlen=history)
+        self.requests = 0
+        self.errors = 0
+        self.total_bytes = 0
+        self.started = time.time()
+    
+    def record(self, client, requestline, status, sent, duration):
+        with self.lock:
+            self.recent.append((time.time(), client, requestline, status, sent, duration))
+            self.requests += 1
+            self.total_bytes += sent
+            if status >= 400:
+                self.errors += 1
+    
+    def snapshot(self, recent=0):
+        """Compteurs, percentiles des durées récentes et les dernières requêtes"""
+        with self.lock:
+            records = list(self.recent)
+            stats = {
+                'uptime': round(time.time() - self.started, 1),
+                'requests': self.requests,
+                'errors': self.errors,
+                'total_bytes': self.total_bytes,
+            }
+        durations = sorted(record[5] for record in records)
+        for name, fraction in (('p50_ms', 0.5), ('p99_ms', 0.99)):
+            if durations:
+                index = min(len(durations) - 1, int(fraction * len(durations)))
+                stats[name] = round(durations[index] * 1000, 1)
+            else:
+                stats[name] = None
+        if recent:
+            stats['recent'] = [
+                {
+                    'time': round(at, 3), 'client': client, 'request': requestline,
+                    'status': status, 'bytes': sent, 'duration_ms': round(duration * 1000, 1),
+                    'throughput': round(sent / duration) if duration > 0 else None,
+                }
+                for at, client, requestline, status, sent, duration in records[-recent:]
+            ]
+        return stats
+
+class LocalHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    """Serveur HTTP local concurrent avec un nombre limité de workers"""
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 32
+    
+    def __init__(self, server_address, handler_class, max_workers=8, idle_timeout=IDLE_TIMEOUT,
+                 scheduler=None):
+        self.max_workers = max(1, int(max_workers))
+        self.idle_timeout = idle_timeout
+        self.worker_slots = threading.BoundedSemaphore(self.max_workers)
+        self.scheduler = scheduler or TransferScheduler()
+        self.metrics = ServerMetrics()
+        self.stopping = False
+        self.transfers = {}
+        self.recent_transfers = deque(maxlen=20)
+        self.transfers_lock = threading.Lock()
+        self._transfer_ids = itertools.count(1)
+        super().__init__(server_address, handler_class)
+    
+    def process_request(self, request, client_address):
+        """Attend un worker libre avant de traiter la connexion"""
+        client = client_address[0]
+        if not self.scheduler.open_connection(client):
+            # Trop de connexions depuis ce client : 503 sans prendre de worker
+            threading.Thread(target=self.refuse_request, args=(request, client), daemon=True).start()
+            return
+        while not self.worker_slots.acquire(timeout=0.5):
+            if self.stopping:
+                self.scheduler.close_connection(client)
+                self.shutdown_request(request)
+                return
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self.worker_slots.release()
+            self.scheduler.close_connection(client)
+            raise
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self.worker_slots.release()
+            self.scheduler.close_connection(client_address[0])
+    
+    def refuse_request(self, request, client):
+        """Lit la requête puis répond 503 (le client réessaiera plus tard)"""
+        started = time.monotonic()
+        requestline = ""
+        try:
+            request.settimeout(2)
+            data = request.recv(65536)
+            requestline = data.split(b"\r\n", 1)[0].decode('latin-1')
+            request.sendall(
+                b"HTTP/1.1 503 Service Unavailable\r\n"
+                b"Retry-After: 5\r\n"
+                b"Content-Length: 0\r\n"
+                b"Connection: close\r\n\r\n"
+            )
+        except OSError:
+            pass
+        self.shutdown_request(request)
+        # Les refus apparaissent dans /_stats comme les autres réponses
+        self.metrics.record(client, requestline, 503, 0, time.monotonic() - started)
+    
+    def shutdown(self):
+        self.stopping = True
+        super().shutdown()
+    
+    def wait_idle(self, wait):
+        """Rend le worker pendant qu'une connexion keep-alive attend sa requête suivante
+        
+        Une console inactive ne bloque donc pas les autres : seules les requêtes
+        en cours comptent dans max_workers. Le worker est repris avant de
+        retourner, l'équilibre avec process_request_thread est conservé.
+        """
+        self.worker_slots.release()
+        try:
+            return wait()
+        finally:
+            self.worker_slots.acquire()
+    
+    def begin_transfer(self, client, path, size=None, file_size=None):
+        with self.transfers_lock:
+            transfer = Transfer(next(self._transfer_ids), client, path, size, file_size)
+            self.transfers[transfer.id] = transfer
+        self.scheduler.register(transfer)
+        return transfer
+    
+    def end_transfer(self, transfer):
+        transfer.finished = time.monotonic()
+        self.scheduler.unregister(transfer)
+        with self.transfers_lock:
+            self.transfers.pop(transfer.id, None)
+            self.recent_transfers.append(transfer)
+    
+    def transfer_snapshot(self):
+        """Retourne les transferts actifs et le dernier transfert terminé"""
+        with self.transfers_lock:
+            active = list(self.transfers.values())
+            last = self.recent_transfers[-1] if self.recent_transfers else None
+        return active, last
+
+class UpstreamFetch:
+    """Téléchargement d'une URL distante vers le cache, partagé entre les clients"""
+    def __init__(self, cache, url, final_path):
+        self.cache = cache
+        self.url = url
+        self.final_path = final_path
+        self.part_path = final_path + ".part"
+        self.cond = threading.Condition()
+        self.headers_ready = False
+        self.total = None
+        self.content_type = "application/octet-stream"
+        self.written = 0
+        self.finished = False
+        self.error = None
+        self.readers = 0
+        self.pending_rename = False
+        # Fichier renommé en final_path : les nouveaux clients le lisent là
+        self.renamed = False
+    
+    def run(self):
+        try:
+            with requests.get(self.url, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                with open(self.part_path, 'wb') as f:
+                    with self.cond:
+                        length = response.headers.get('Content-Length')
+                        if length and length.isdigit() and 'Content-Encoding' not in response.headers:
+                            self.total = int(length)
+                        self.content_type = response.headers.get('Content-Type', self.content_type)
+                        self.headers_ready = True
+                        self.cond.notify_all()
+                    
+                    for chunk in response.iter_content(COPY_BUFSIZE):
+                        f.write(chunk)
+                        f.flush()
+                        with self.cond:
+                            self.written += len(chunk)
+                            self.cond.notify_all()
+            
+            if self.total is not None and self.written != self.total:
+                raise IOError(f"incomplete download ({self.written}/{self.total} bytes)")
+        except Exception as e:
+            with self.cond:
+                self.error = str(e) or type(e).__name__
+        finally:
+            with self.cond:
+                self.finished = True
+                self.headers_ready = True
+                self.cond.notify_all()
+            self.cache.fetch_finished(self)
+    
+    def wait_headers(self, timeout):
+        with self.cond:
+            return self.cond.wait_for(lambda: self.headers_ready, timeout)
+    
+    def open_reader(self):
+        """Lecteur du fichier en cours ; None s'il est déjà complet dans final_path
+        
+        Sous self.cond : complete() renomme le .part sous le même verrou, le
+        fichier ouvert ici existe donc forcément. readers n'est compté qu'une
+        fois l'ouverture réussie.
+        """
+        with self.cond:
+            if self.error:
+                raise OSError(self.error)
+            if self.renamed:
+                return None
+            reader = CachedFetchReader(self)
+            self.readers += 1
+            return reader
+    
+    def release_reader(self):
+        with self.cond:
+            self.readers -= 1
+            rename = self.pending_rename and self.readers == 0
+        if rename:
+            self.cache.complete(self)
+
+class CachedFetchReader:
+    """Lecture d'un fichier en cours de téléchargement (attend les octets manquants)"""
+    def __init__(self, fetch):
+        self.fetch = fetch
+        self.file = open(fetch.part_path, 'rb')
+        self.position = 0
+    
+    def read(self, size=-1):
+        fetch = self.fetch
+        with fetch.cond:
+            fetch.cond.wait_for(lambda: self.position < fetch.written or fetch.finished)
+            available = fetch.written - self.position
+        if available <= 0:
+            return b""
+        if size is None or size < 0:
+            size = available
+        data = self.file.read(min(size, available))
+        self.position += len(data)
+        return data
+    
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.fetch.release_reader()
+
+class ProxyCache:
+    """Cache disque LRU des fichiers distants servis sur le réseau local
+    
+    Le premier client déclenche le téléchargement ; les clients suivants lisent
+    le même fichier pendant qu'il arrive, puis depuis le disque une fois complet.
+    """
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        
+        # Fichiers déjà en cache, du plus ancien au plus récent
+        files = []
+        for entry in os.scandir(directory):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".part"):
+                # Téléchargement interrompu lors d'un lancement précédent
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+                continue
+            stat = entry.stat()
+            files.append((stat.st_mtime, entry.path, stat.st_size))
+        for _, path, size in sorted(files):
+            self.entries[path] = size
+            self.total_bytes += size
+    
+    def path_for(self, url):
+        ext = os.path.splitext(url.split('?', 1)[0])[1][:8]
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + ext)
+    
+    def get(self, url):
+        """Retourne le chemin du fichier en cache, ou le téléchargement en cours"""
+        path = self.path_for(url)
+        with self.lock:
+            if path in self.entries:
+                self.entries.move_to_end(path)
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                return path
+            fetch = self.inflight.get(url)
+            if fetch is None:
+                fetch = UpstreamFetch(self, url, path)
+                self.inflight[url] = fetch
+                threading.Thread(target=fetch.run, daemon=True).start()
+            return fetch
+    
+    def fetch_finished(self, fetch):
+        if fetch.error:
+            with self.lock:
+                self.inflight.pop(fetch.url, None)
+            try:
+                os.remove(fetch.part_path)
+            except OSError:
+                pass
+            return
+        self.complete(fetch)
+    
+    def complete(self, fetch):
+        """Rend le fichier téléchargé disponible puis libère de la place si besoin"""
+        with fetch.cond:
+            try:
+                os.replace(fetch.part_path, fetch.final_path)
+            except PermissionError:
+                # Windows : des lecteurs ont encore le fichier ouvert, le dernier renommera
+                fetch.pending_rename = True
+                return
+            except OSError:
+                with self.lock:
+                    self.inflight.pop(fetch.url, None)
+                return
+            fetch.pending_rename = False
+            fetch.renamed = True
+        
+        with self.lock:
+            self.inflight.pop(fetch.url, None)
+            self.entries[fetch.final_path] = fetch.written
+            self.total_bytes += fetch.written
+            self.evict()
+    
+    def evict(self):
+        """Supprime les fichiers les moins récemment servis au-delà de max_bytes"""
+        for path in list(self.entries):
+            if self.total_bytes <= self.max_bytes or len(self.entries) <= 1:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Fichier encore ouvert (Windows) : on réessaiera plus tard
+                continue
+            self.total_bytes -= self.entries.pop(path)
+
+class ReferenceManifest:
+    """Fichiers servis sans copie : nom publié -> chemin externe (references.json)"""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.refs = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.refs = json.load(f)
+        except (OSError, ValueError):
+            self.refs = {}
+    
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.refs, f, indent=1)
+        os.replace(tmp_path, self.path)
+    
+    def add(self, name, target):
+        with self.lock:
+            self.refs[name] = os.path.abspath(target)
+            self.save()
+    
+    def remove(self, name):
+        with self.lock:
+            if self.refs.pop(name, None) is not None:
+                self.save()
+    
+    def resolve(self, name):
+        """Chemin externe d'un nom publié, s'il existe encore"""
+        target = self.refs.get(name)
+        if target and os.path.isfile(target):
+            return target
+        return None
+    
+    def __contains__(self, name):
+        return name in self.refs
+    
+    def items(self):
+        with self.lock:
+            return list(self.refs.items())
+
+def try_reflink(source, dest):
+    """Clone copy-on-write (Btrfs, XFS...) : aucun octet copié, aucun espace en plus"""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    FICLONE = 0x40049409
+    try:
+        with open(source, 'rb') as src, open(dest, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        try:
+            os.remove(dest)
+        except OSError:
+            pass
+        return False
+
+def copy_with_progress(source, dest, progress=None, cancel=None):
+    """Copie par blocs vers un fichier .part renommé à la fin"""
+    total = os.path.getsize(source)
+    tmp_path = dest + ".part"
+    done = 0
+    try:
+        with open(source, 'rb') as src, open(tmp_path, 'wb') as dst:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise InterruptedError("copy cancelled")
+                buf = src.read(COPY_CHUNK_SIZE)
+                if not buf:
+                    break
+                dst.write(buf)
+                done += len(buf)
+                if progress:
+                    progress(done, total)
+        shutil.copystat(source, tmp_path)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class FolderWatcher:
+    """Surveille le dossier local par instantanés stat, sans dépendance
+    
+    Le dossier n'est relu que si sa date de modification change (ajout,
+    suppression ou renommage d'un fichier). Les différences sont envoyées à
+    on_changes(ajoutés, supprimés, renommés) depuis le thread de surveillance.
+    """
+    valid_extensions = GAME_EXTENSIONS
+    
+    def __init__(self, folder, on_changes, interval=WATCH_INTERVAL):
+        self.folder = folder
+        self.on_changes = on_changes
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.folder_mtime = None
+        self.files = self.snapshot()
+    
+    def snapshot(self):
+        """{nom: (inode, taille)} des jeux du dossier"""
+        files = {}
+        try:
+            self.folder_mtime = os.stat(self.folder).st_mtime_ns
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if entry.name.lower().endswith(self.valid_extensions) and entry.is_file():
+                        stat = entry.stat()
+                        files[entry.name] = (stat.st_ino, stat.st_size)
+        except OSError:
+            pass
+        return files
+    
+    def poll(self):
+        """Compare avec l'instantané précédent ; retourne True si quelque chose a changé"""
+        try:
+            mtime = os.stat(self.folder).st_mtime_ns
+        except OSError:
+            return False
+        # Systèmes de fichiers à date grossière (FAT : 2 s) : on relit tant que c'est récent
+        if mtime == self.folder_mtime and time.time() - mtime / 1e9 > 2:
+            return False
+        
+        files = self.snapshot()
+        old_names = self.files.keys() - files.keys()
+        new_names = files.keys() - self.files.keys()
+        
+        # Renommage : même inode sous un autre nom
+        old_by_inode = {self.files[name][0]: name for name in old_names if self.files[name][0]}
+        renamed = []
+        for name in list(new_names):
+            old = old_by_inode.pop(files[name][0], None)
+            if old is not None:
+                renamed.append((old, name))
+                old_names.discard(old)
+                new_names.discard(name)
+        
+        self.files = files
+        if old_names or new_names or renamed:
+            self.on_changes(sorted(new_names), sorted(old_names), renamed)
+            return True
+        return False
+    
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.poll()
+    
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        self.stop_event.set()
+
+class ShortLinks:
+    """Identifiants courts (/g/<id>) pour les URLs du catalogue
+    
+    Les identifiants viennent d'un compteur SQLite écrit en base 36 : ils restent
+    valides d'un lancement à l'autre, y compris sur des planches imprimées.
+    """
+    ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+    
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.by_url = {}
+        self.by_id = {}
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS short_links ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " url TEXT UNIQUE)"
+            )
+            db.commit()
+            for number, url in db.execute("SELECT id, url FROM short_links"):
+                self._remember(self.encode(number), url)
+        finally:
+            db.close()
+    
+    @classmethod
+    def encode(cls, number):
+        digits = ""
+        while True:
+            number, rest = divmod(number, 36)
+            digits = cls.ALPHABET[rest] + digits
+            if not number:
+                return digits
+    
+    def _remember(self, short_id, url):
+        self.by_id[short_id] = url
+        self.by_url[url] = short_id
+    
+    def shorten(self, url):
+        """Retourne l'identifiant court d'une URL (créé au besoin)"""
+        with self.lock:
+            short_id = self.by_url.get(url)
+            if short_id:
+                return short_id
+            db = sqlite3.connect(self.path, timeout=10)
+            try:
+                cursor = db.execute("INSERT OR IGNORE INTO short_links (url) VALUES (?)", (url,))
+                number = cursor.lastrowid
+                if not cursor.rowcount:
+                    number = db.execute("SELECT id FROM short_links WHERE url = ?", (url,)).fetchone()[0]
+                db.commit()
+            finally:
+                db.close()
+            short_id = self.encode(number)
+            self._remember(short_id, url)
+            return short_id
+    
+    def shorten_many(self, urls):
+        """Identifiants courts d'une liste d'URLs, en une seule transaction
+        
+        Une connexion et un commit pour tout le lot : shorten() un par un sur
+        un gros catalogue ouvrirait autant de connexions que d'URLs.
+        """
+        with self.lock:
+            missing = list(dict.fromkeys(url for url in urls if url not in self.by_url))
+            if missing:
+                db = sqlite3.connect(self.path, timeout=10)
+                try:
+                    db.executemany("INSERT OR IGNORE INTO short_links (url) VALUES (?)",
+                                   [(url,) for url in missing])
+                    db.commit()
+                    for start in range(0, len(missing), 500):
+                        chunk = missing[start:start + 500]
+                        marks = ",".join("?" * len(chunk))
+                        for number, url in db.execute(
+                            f"SELECT id, url FROM short_links WHERE url IN ({marks})", chunk
+                        ):
+                            self._remember(self.encode(number), url)
+                finally:
+                    db.close()
+            return [self.by_url[url] for url in urls]
+    
+    def resolve(self, short_id):
+        return self.by_id.get(short_id)
 
 class LocalServerHandler(http.server.SimpleHTTPRequestHandler):
     """Handler personnalisé pour le serveur HTTP local"""
+    # Connexions persistantes : plusieurs petits fichiers sur la même connexion
+    protocol_version = "HTTP/1.1"
+    # Les réponses courtes partent sans attendre (pas d'algorithme de Nagle)
+    disable_nagle_algorithm = True
+    
     def __init__(self, *args, directory=None, **kwargs):
         self.directory = directory
+        self.body_length = None
+        self.file_size = None
         super().__init__(*args, directory=directory, **kwargs)
     
+    def setup(self):
+        # Une connexion inactive est fermée après idle_timeout secondes
+        self.timeout = getattr(self.server, "idle_timeout", IDLE_TIMEOUT)
+        super().setup()
+    
+    def handle(self):
+        """Requêtes de la connexion ; entre deux, le worker est libéré (wait_idle)"""
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            if not self.server.wait_idle(self.wait_next_request) or self.server.stopping:
+                break
+            self.handle_one_request()
+    
+    def wait_next_request(self):
+        """Attend le début de la requête suivante ; False si le client part ou se tait"""
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+    
+    def send_head(self):
+        """Envoie les en-têtes d'un fichier en gérant Range/If-Range et les validateurs"""
+        self.body_length = None
+        self.file_size = None
+        if self.path.startswith("/g/"):
+            return self.send_short_link()
+        if self.path.split('?', 1)[0] == "/_stats":
+            return self.send_stats()
+        
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            # Dossiers, redirections et 404 : comportement standard
+            return super().send_head()
+        return self.send_file_head(path)
+    
+    def send_file_head(self, path):
+        """En-têtes d'un fichier disque (200, 206, 304 ou 416) et fichier ouvert à envoyer"""
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        
+        try:
+            fs = os.fstat(f.fileno())
+            size = fs.st_size
+            etag = f'"{fs.st_mtime_ns:x}-{size:x}"'
+            last_modified = self.date_time_string(fs.st_mtime)
+            
+            if self.is_not_modified(etag, fs.st_mtime):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_validators(etag, last_modified)
+                self.end_headers()
+                f.close()
+                return None
+            
+            byte_range = self.requested_range(size, etag, last_modified)
+            if byte_range == "unsatisfiable":
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.send_validators(etag, last_modified)
+                self.end_headers()
+                f.close()
+                return None
+            
+            if byte_range:
+                start, end = byte_range
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                start, end = 0, size - 1
+                self.send_response(HTTPStatus.OK)
+            
+            self.body_length = end - start + 1
+            self.file_size = size
+            self.send_header("Content-type", self.guess_type(path))
+            self.send_header("Content-Length", str(self.body_length))
+            self.send_validators(etag, last_modified)
+            self.end_headers()
+            f.seek(start)
+            return f
+        except:
+            f.close()
+            raise
+    
+    def translate_path(self, path):
+        """Chemin local, ou fichier externe ajouté par référence"""
+        local_path = super().translate_path(path)
+        references = getattr(self.server, "references", None)
+        if references is not None and not os.path.exists(local_path):
+            name = urllib.parse.unquote(path.split('?', 1)[0].split('#', 1)[0]).lstrip('/')
+            target = references.resolve(name)
+            if target:
+                return target
+        return local_path
+    
+    def list_directory(self, path):
+        """Listing standard, plus les fichiers référencés à la racine"""
+        references = getattr(self.server, "references", None)
+        root = os.path.realpath(self.directory)
+        if references is None or os.path.realpath(path) != root:
+            return super().list_directory(path)
+        
+        try:
+            names = set(os.listdir(path))
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "No permission to list directory")
+            return None
+        names.update(name for name, _ in references.items() if references.resolve(name))
+        
+        title = "Directory listing for /"
+        lines = [
+            '<!DOCTYPE HTML>',
+            '<html lang="en">',
+            '<head>',
+            '<meta charset="utf-8">',
+            f'<title>{title}</title>',
+            '</head>',
+            f'<body>\n<h1>{title}</h1>',
+            '<hr>\n<ul>',
+        ]
+        for name in sorted(names, key=str.lower):
+            display = name + "/" if os.path.isdir(os.path.join(path, name)) else name
+            lines.append('<li><a href="%s">%s</a></li>' % (
+                urllib.parse.quote(display, errors='surrogatepass'), html.escape(display, quote=False)
+            ))
+        lines.append('</ul>\n<hr>\n</body>\n</html>\n')
+        encoded = "\n".join(lines).encode("utf-8", "surrogateescape")
+        
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        return io.BytesIO(encoded)
+    
+    def send_stats(self):
+        """État du serveur en JSON : compteurs, transferts actifs, dernières requêtes"""
+        stats = self.server.metrics.snapshot(recent=50)
+        active, _ = self.server.transfer_snapshot()
+        stats['active_transfers'] = [
+            {
+                'client': t.client, 'path': t.path, 'sent': t.sent, 'size': t.size,
+                'throughput': round(t.throughput),
+            }
+            for t in active
+        ]
+        stats['total_bytes'] += sum(t.sent for t in active)
+        body = json.dumps(stats, indent=1).encode("utf-8")
+        
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        return io.BytesIO(body)
+    
+    def send_short_link(self):
+        """Redirige /g/<id> vers l'URL complète du jeu"""
+        short_id = self.path[3:].split('?', 1)[0].strip('/')
+        short_links = getattr(self.server, "short_links", None)
+        url = short_links.resolve(short_id) if short_links else None
+        if not url:
+            self.send_error(HTTPStatus.NOT_FOUND, "Unknown short link")
+            return None
+        
+        # Cache LAN actif : le serveur télécharge et garde le fichier lui-même
+        proxy_cache = getattr(self.server, "proxy_cache", None)
+        if proxy_cache is not None and not url.startswith(f"http://{self.headers.get('Host')}/"):
+            return self.send_proxied(proxy_cache, url)
+        
+        self.send_response(HTTPStatus.FOUND)
+        self.send_header("Location", url)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return None
+    
+    def send_proxied(self, proxy_cache, url):
+        """Sert une URL distante depuis le cache LAN (fichier complet ou en cours)"""
+        try:
+            entry = proxy_cache.get(url)
+        except OSError as e:
+            self.send_error(HTTPStatus.BAD_GATEWAY, f"Cache error: {e}")
+            return None
+        if isinstance(entry, str):
+            return self.send_file_head(entry)
+        
+        # Téléchargement partagé en cours : on suit le fichier qui grossit
+        fetch = entry
+        if not fetch.wait_headers(PROXY_HEADERS_TIMEOUT) or fetch.error:
+            self.send_error(HTTPStatus.BAD_GATEWAY, f"Upstream error: {fetch.error or 'timeout'}")
+            return None
+        
+        try:
+            reader = fetch.open_reader()
+        except OSError as e:
+            self.send_error(HTTPStatus.BAD_GATEWAY, f"Upstream error: {e}")
+            return None
+        if reader is None:
+            # Terminé entre-temps : le fichier complet est servi comme un fichier local
+            return self.send_file_head(fetch.final_path)
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-type", fetch.content_type)
+        if fetch.total is not None:
+            self.body_length = fetch.total
+            self.send_header("Content-Length", str(fetch.total))
+        else:
+            self.close_connection = True
+            self.send_header("Connection", "close")
+        self.end_headers()
+        return reader
+    
+    def send_validators(self, etag, last_modified):
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+    
+    def is_not_modified(self, etag, mtime):
+        """Vérifie If-None-Match puis If-Modified-Since"""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match:
+            tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError, IndexError, OverflowError):
+                return False
+            if since is not None and since.tzinfo is not None:
+                return int(mtime) <= since.timestamp()
+        return False
+    
+    def requested_range(self, size, etag, last_modified):
+        """Retourne (debut, fin) demandé par le client, None pour tout le fichier"""
+        header = self.headers.get("Range")
+        if not header:
+            return None
+        
+        # If-Range : on ne reprend que si le fichier n'a pas changé
+        if_range = self.headers.get("If-Range")
+        if if_range and if_range.strip() not in (etag, last_modified):
+            return None
+        
+        match = RANGE_RE.match(header.strip())
+        if not match or match.groups() == ("", ""):
+            # Plages multiples ou syntaxe inconnue : on envoie tout le fichier
+            return None
+        
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            if start >= size:
+                return "unsatisfiable"
+            if end < start:
+                return None
+        else:
+            suffix = int(last)
+            if suffix == 0 or size == 0:
+                return "unsatisfiable"
+            start, end = max(0, size - suffix), size - 1
+        return start, end
+    
+    def copyfile(self, source, outputfile):
+        """Envoie le fichier au client en mesurant le débit de la connexion"""
+        transfer = self.server.begin_transfer(
+            self.client_address[0], self.path, self.body_length, self.file_size
+        )
+        try:
+            try:
+                fileno = source.fileno()
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                fileno = None
+            
+            # Les vrais fichiers (.cia/.3ds) partent sans passer par Python
+            if fileno is not None and outputfile is self.wfile:
+                self.send_file_zero_copy(source, fileno, transfer)
+            else:
+                self.copy_buffered(source, outputfile, transfer)
+        finally:
+            self.bytes_sent = transfer.sent
+            self.server.end_transfer(transfer)
+    
+    def send_file_zero_copy(self, source, fileno, transfer):
+        """Envoie un fichier avec os.sendfile, ou via mmap si sendfile n'existe pas"""
+        offset = source.tell()
+        end = os.fstat(fileno).st_size
+        if self.body_length is not None:
+            end = min(end, offset + self.body_length)
+        if offset >= end:
+            return
+        
+        scheduler = self.server.scheduler
+        if hasattr(os, "sendfile"):
+            while offset < end:
+                chunk = scheduler.chunk_size(transfer, SENDFILE_CHUNK)
+                sent = self.connection.sendfile(source, offset, min(chunk, end - offset))
+                if not sent:
+                    break
+                offset += sent
+                transfer.sent += sent
+                scheduler.pace(transfer, sent)
+            return
+        
+        # Windows : pas de sendfile, on envoie des vues mmap sans copie intermédiaire
+        try:
+            mapped = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.copy_buffered(source, self.wfile, transfer)
+            return
+        with mapped:
+            view = memoryview(mapped)
+            try:
+                while offset < end:
+                    size = scheduler.chunk_size(transfer, COPY_BUFSIZE)
+                    chunk = view[offset:min(offset + size, end)]
+                    self.connection.sendall(chunk)
+                    offset += len(chunk)
+                    transfer.sent += len(chunk)
+                    scheduler.pace(transfer, len(chunk))
+                    chunk.release()
+            finally:
+                view.release()
+    
+    def copy_buffered(self, source, outputfile, transfer):
+        """Copie classique par blocs (listings, flux en mémoire)"""
+        scheduler = self.server.scheduler
+        remaining = self.body_length
+        while remaining is None or remaining > 0:
+            size = scheduler.chunk_size(transfer, COPY_BUFSIZE)
+            if remaining is not None:
+                size = min(size, remaining)
+            buf = source.read(size)
+            if not buf:
+                break
+            outputfile.write(buf)
+            transfer.sent += len(buf)
+            scheduler.pace(transfer, len(buf))
+            if remaining is not None:
+                remaining -= len(buf)
+        if remaining:
+            # Corps incomplet (source interrompue) : la connexion n'est plus réutilisable
+            self.close_connection = True
+    
+    def parse_request(self):
+        # La durée compte à partir de la ligne de requête (pas l'attente keep-alive)
+        self.request_started = time.monotonic()
+        self.response_status = None
+        self.bytes_sent = 0
+        return super().parse_request()
+    
+    def handle_one_request(self):
+        self.request_started = time.monotonic()
+        self.response_status = None
+        self.bytes_sent = 0
+        super().handle_one_request()
+        if self.response_status is not None:
+            self.server.metrics.record(
+                self.client_address[0], self.requestline, self.response_status,
+                self.bytes_sent, time.monotonic() - self.request_started
+            )
+    
+    def log_request(self, code='-', size='-'):
+        """Garde le statut pour le journal du serveur (rien dans la console)"""
+        if isinstance(code, HTTPStatus):
+            code = code.value
+        self.response_status = code
+    
     def log_message(self, format, *args):
         """Désactive les logs dans la console"""
         pass
 
+class IndexLinkParser(HTMLParser):
+    """Extrait au fil de l'eau les liens .cia/.3ds/.3dsx d'une page d'index
+    
+    La page est donnée bloc par bloc avec feed() : seuls les liens trouvés et la
+    fin incomplète du dernier bloc restent en mémoire, quelle que soit la taille
+    de l'index.
+    """
+    valid_extensions = GAME_EXTENSIONS
+    
+    def __init__(self, directories=None):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        # Liste à remplir avec les liens de sous-dossiers (None : ignorés)
+        self.directories = directories
+    
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a':
+            return
+        for key, value in attrs:
+            if key == 'href' and value:
+                if value.lower().endswith(self.valid_extensions):
+                    self.links.append(value)
+                elif (self.directories is not None and value.endswith('/')
+                      and not value.startswith(('../', '?', '#'))):
+                    self.directories.append(value)
+                break
+    
+    def take_links(self):
+        """Retourne et oublie les liens trouvés depuis le dernier appel"""
+        links, self.links = self.links, []
+        return links
+
+class CatalogCache:
+    """Cache SQLite des catalogues distants (jeux + validateurs ETag/Last-Modified)"""
+    def __init__(self, path):
+        self.path = path
+        db = self.connect()
+        try:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS catalogs ("
+                " url TEXT PRIMARY KEY,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " fetched_at REAL,"
+                " games TEXT)"
+            )
+            db.commit()
+        finally:
+            db.close()
+    
+    def connect(self):
+        # Une connexion par appel : le cache est utilisé depuis plusieurs threads
+        return sqlite3.connect(self.path, timeout=10)
+    
+    def load(self, url):
+        """Retourne (etag, last_modified, jeux) pour une URL, ou None"""
+        db = self.connect()
+        try:
+            row = db.execute(
+                "SELECT etag, last_modified, games FROM catalogs WHERE url = ?", (url,)
+            ).fetchone()
+        finally:
+            db.close()
+        if row is None:
+            return None
+        return row[0], row[1], [CatalogEntry.from_row(game) for game in json.loads(row[2])]
+    
+    def store(self, url, etag, last_modified, games):
+        """Enregistre le catalogue complet d'une URL"""
+        db = self.connect()
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO catalogs (url, etag, last_modified, fetched_at, games)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, time.time(), json.dumps([game.to_row() for game in games]))
+            )
+            db.commit()
+        finally:
+            db.close()
+    
+    def touch(self, url):
+        """Marque un catalogue comme le plus récemment utilisé"""
+        db = self.connect()
+        try:
+            db.execute("UPDATE catalogs SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            db.commit()
+        finally:
+            db.close()
+    
+    def last(self):
+        """Retourne (url, jeux) du dernier catalogue chargé, ou None"""
+        db = self.connect()
+        try:
+            row = db.execute(
+                "SELECT url, games FROM catalogs ORDER BY fetched_at DESC LIMIT 1"
+            ).fetchone()
+        finally:
+            db.close()
+        if row is None:
+            return None
+        return row[0], [CatalogEntry.from_row(game) for game in json.loads(row[1])]
+
+def read_at(f, offset, size):
+    f.seek(offset)
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("truncated header")
+    return data
+
+def align64(value):
+    return (value + 63) & ~63
+
+def parse_smdh(data):
+    """Titre anglais et région d'un SMDH (icône + textes d'une application)"""
+    if data[:4] != b'SMDH':
+        return {}
+    # Titres : 16 langues de 0x200 octets, l'anglais est le deuxième
+    title = data[0x208:0x288].decode('utf-16-le', 'ignore').split('\0', 1)[0].strip()
+    region_flags = int.from_bytes(data[0x2018:0x201C], 'little') & 0x7F
+    regions = {SMDH_REGIONS[bit] for bit in range(7) if region_flags & (1 << bit)}
+    info = {'title': title or None}
+    if region_flags == 0x7F:
+        info['region'] = 'Region Free'
+    elif len(regions) == 1:
+        info['region'] = regions.pop()
+    return info
+
+def parse_ncch(f, offset):
+    """Identifiant, code produit et SMDH d'une partition NCCH"""
+    header = read_at(f, offset, 0x200)
+    if header[0x100:0x104] != b'NCCH':
+        return {}
+    product_code = header[0x150:0x160].split(b'\0', 1)[0].decode('ascii', 'ignore').strip()
+    info = {
+        'title_id': f"{int.from_bytes(header[0x118:0x120], 'little'):016X}",
+        'product_code': product_code or None,
+    }
+    if product_code[-1:] in PRODUCT_REGIONS:
+        info['region'] = PRODUCT_REGIONS[product_code[-1]]
+    
+    # L'icône est dans l'ExeFS, lisible seulement si la partition n'est pas chiffrée
+    exefs_offset = int.from_bytes(header[0x1A0:0x1A4], 'little') * MEDIA_UNIT
+    if header[0x18F] & 0x4 and exefs_offset:
+        exefs = read_at(f, offset + exefs_offset, 0xA0)
+        for i in range(0, 0xA0, 0x10):
+            if exefs[i:i + 8].rstrip(b'\0') == b'icon':
+                icon_offset = int.from_bytes(exefs[i + 8:i + 12], 'little')
+                smdh = read_at(f, offset + exefs_offset + 0x200 + icon_offset, 0x2020)
+                info.update({k: v for k, v in parse_smdh(smdh).items() if v})
+                break
+    return info
+
+def parse_cci(f):
+    """Cartouche (.3ds) : en-tête NCSD puis NCCH de la partition 0"""
+    header = read_at(f, 0, 0x200)
+    if header[0x100:0x104] != b'NCSD':
+        return {}
+    info = {'title_id': f"{int.from_bytes(header[0x108:0x110], 'little'):016X}"}
+    partition = int.from_bytes(header[0x120:0x124], 'little') * MEDIA_UNIT
+    if partition:
+        ncch = parse_ncch(f, partition)
+        ncch.pop('title_id', None)
+        info.update(ncch)
+    return info
+
+def parse_cia(f):
+    """Paquet CIA : TMD (identifiant, version), NCCH du contenu 0 et SMDH de la section meta"""
+    header = read_at(f, 0, 0x20)
+    (header_size, _, _, cert_size, ticket_size, tmd_size,
+     meta_size, content_size) = struct.unpack_from('<IHHIIIIQ', header)
+    if header_size != 0x2020 or not tmd_size:
+        return {}
+    tmd_offset = align64(align64(align64(header_size) + cert_size) + ticket_size)
+    content_offset = align64(tmd_offset + tmd_size)
+    meta_offset = align64(content_offset + content_size)
+    
+    # Signature du TMD : sa taille dépend du type (RSA-4096, RSA-2048, ECDSA ;
+    # 0x1000x en SHA-1, 0x1000x+3 en SHA-256)
+    signature_type = int.from_bytes(read_at(f, tmd_offset, 4), 'big')
+    signature_size = {
+        0x10000: 0x23C, 0x10001: 0x13C, 0x10002: 0x7C,
+        0x10003: 0x23C, 0x10004: 0x13C, 0x10005: 0x7C,
+    }.get(signature_type)
+    if signature_size is None:
+        return {}
+    tmd = read_at(f, tmd_offset + 4 + signature_size, 0xA0)
+    info = {
+        'title_id': f"{int.from_bytes(tmd[0x4C:0x54], 'big'):016X}",
+        'version': int.from_bytes(tmd[0x9C:0x9E], 'big'),
+    }
+    
+    # En-tête NCCH du contenu 0 (illisible si le contenu est chiffré)
+    ncch = parse_ncch(f, content_offset)
+    ncch.pop('title_id', None)
+    info.update(ncch)
+    
+    # Section meta : 0x400 octets de dépendances puis le SMDH, toujours en clair
+    if meta_size >= 0x400 + 0x2020:
+        smdh = read_at(f, meta_offset + 0x400, 0x2020)
+        info.update({k: v for k, v in parse_smdh(smdh).items() if v})
+    return info
+
+def parse_3dsx(f):
+    """Homebrew (.3dsx) : SMDH de l'en-tête étendu, s'il existe"""
+    header = read_at(f, 0, 0x2C)
+    if header[:4] != b'3DSX' or int.from_bytes(header[4:6], 'little') <= 0x20:
+        return {}
+    smdh_offset = int.from_bytes(header[0x20:0x24], 'little')
+    smdh_size = int.from_bytes(header[0x24:0x28], 'little')
+    if smdh_size < 0x2020:
+        return {}
+    return parse_smdh(read_at(f, smdh_offset, 0x2020))
+
+def read_title_metadata(path):
+    """Lit les métadonnées d'un jeu dans ses en-têtes (quelques Ko, jamais le fichier entier)"""
+    parsers = {'.cia': parse_cia, '.3ds': parse_cci, '.3dsx': parse_3dsx}
+    parser = parsers.get(os.path.splitext(path)[1].lower())
+    if parser is None:
+        return {}
+    try:
+        with open(path, 'rb') as f:
+            info = parser(f)
+    except (OSError, ValueError, IndexError):
+        return {}
+    return {key: value for key, value in info.items() if value is not None}
+
+class TitleMetadataCache:
+    """Métadonnées des en-têtes, gardées dans SQLite par (chemin, taille, mtime)
+    
+    Un fichier déjà lu et inchangé n'est pas rouvert : relire une grosse
+    bibliothèque ne coûte qu'un stat par fichier.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS title_metadata ("
+                " path TEXT PRIMARY KEY,"
+                " size INTEGER,"
+                " mtime_ns INTEGER,"
+                " info TEXT)"
+            )
+            db.commit()
+            for path, size, mtime_ns, info in db.execute(
+                "SELECT path, size, mtime_ns, info FROM title_metadata"
+            ):
+                self.entries[path] = (size, mtime_ns, json.loads(info))
+        finally:
+            db.close()
+    
+    def lookup_many(self, paths):
+        """{chemin: métadonnées} ; seuls les fichiers nouveaux ou modifiés sont lus"""
+        results = {}
+        updates = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            with self.lock:
+                entry = self.entries.get(path)
+            if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                results[path] = entry[2]
+                continue
+            info = read_title_metadata(path)
+            with self.lock:
+                self.entries[path] = (stat.st_size, stat.st_mtime_ns, info)
+            updates.append((path, stat.st_size, stat.st_mtime_ns, json.dumps(info)))
+            results[path] = info
+        
+        if updates:
+            db = sqlite3.connect(self.path, timeout=10)
+            try:
+                db.executemany(
+                    "INSERT OR REPLACE INTO title_metadata (path, size, mtime_ns, info)"
+                    " VALUES (?, ?, ?, ?)",
+                    updates
+                )
+                db.commit()
+            finally:
+                db.close()
+        return results
+    
+    def lookup(self, path):
+        return self.lookup_many([path]).get(path, {})
+
+class SearchIndex:
+    """Index de recherche sur le catalogue
+    
+    Chaque jeu a une clé normalisée (nom, région et type en minuscules) et un
+    index de trigrammes donne directement les candidats d'une requête. Quand la
+    requête contient la précédente, on filtre seulement les résultats précédents.
+    """
+    def __init__(self, games=()):
+        self.games = []
+        self.names = []
+        self.keys = []
+        self.trigrams = {}
+        # Positions retirées (fichier supprimé) : ignorées sans refaire l'index
+        self.removed = set()
+        self.last_query = None
+        self.last_matches = None
+        self.extend(games)
+    
+    @staticmethod
+    def key(game):
+        # Séparateur "\n" : une requête ne peut pas chevaucher deux champs
+        return f"{game.name.lower()}\n{game.region.lower()}\n{game.type.lower()}"
+    
+    @staticmethod
+    def grams(key):
+        # Trigrammes, plus les caractères seuls pour les requêtes courtes
+        grams = set(key)
+        grams.update(key[i:i + 3] for i in range(len(key) - 2))
+        return grams
+    
+    def extend(self, games):
+        """Ajoute des jeux à la fin de l'index"""
+        for game in games:
+            position = len(self.games)
+            key = self.key(game)
+            self.games.append(game)
+            # Espace en tête : " requête" trouve aussi le début du nom
+            self.names.append(" " + game.name.lower())
+            self.keys.append(key)
+            for gram in self.grams(key):
+                self.trigrams.setdefault(gram, []).append(position)
+        self.last_query = None
+        self.last_matches = None
+    
+    def discard(self, games):
+        """Retire des jeux des résultats ; leurs positions restent dans l'index"""
+        targets = {id(game) for game in games}
+        self.removed.update(p for p, game in enumerate(self.games) if id(game) in targets)
+        self.last_query = None
+        self.last_matches = None
+    
+    def replace(self, position, game):
+        """Remplace le jeu d'une position (doublon venu d'une meilleure source)"""
+        old_key = self.keys[position]
+        key = self.key(game)
+        self.games[position] = game
+        if key != old_key:
+            self.names[position] = " " + game.name.lower()
+            self.keys[position] = key
+            old_grams = self.grams(old_key)
+            new_grams = self.grams(key)
+            # Les listes de positions restent triées (ordre du catalogue)
+            for gram in old_grams - new_grams:
+                postings = self.trigrams[gram]
+                del postings[bisect.bisect_left(postings, position)]
+            for gram in new_grams - old_grams:
+                bisect.insort(self.trigrams.setdefault(gram, []), position)
+        self.last_query = None
+        self.last_matches = None
+    
+    def candidates(self, query):
+        """Positions à vérifier pour une requête, dans l'ordre du catalogue"""
+        if len(query) == 1:
+            return self.trigrams.get(query, [])
+        if len(query) == 2:
+            # Plus courte des deux listes de caractères (elle est filtrée ensuite)
+            return min((self.trigrams.get(c, []) for c in query), key=len)
+        if self.last_query is not None and self.last_query in query:
+            return self.last_matches
+        grams = [query[i:i + 3] for i in range(len(query) - 2)]
+        best = None
+        for gram in grams:
+            postings = self.trigrams.get(gram)
+            if postings is None:
+                return []
+            if best is None or len(postings) < len(best):
+                best = postings
+        return best
+    
+    def search(self, query):
+        """Retourne les jeux correspondants, les meilleurs en premier
+        
+        Le résultat est une SearchResults : le classement n'est calculé que
+        jusqu'aux lignes réellement affichées.
+        """
+        query = query.lower()
+        if not query:
+            self.last_query = None
+            self.last_matches = None
+            return list(self.games)
+        
+        keys = self.keys
+        candidates = self.candidates(query)
+        if len(query) == 1:
+            # La liste d'un caractère seul est déjà exacte
+            matches = list(candidates)
+        else:
+            matches = [p for p in candidates if query in keys[p]]
+        if self.removed and candidates is not self.last_matches:
+            removed = self.removed
+            matches = [p for p in matches if p not in removed]
+        self.last_query = query
+        self.last_matches = matches
+        
+        # Classement : début du nom, début d'un mot, puis le reste (ordre du catalogue)
+        names = self.names
+        word = " " + query
+        tiers = (
+            (p for p in matches if names[p].startswith(word)),
+            (p for p in matches if word in names[p] and not names[p].startswith(word)),
+            (p for p in matches if word not in names[p]),
+        )
+        return SearchResults(self.games, len(matches), itertools.chain(*tiers))
+
+class SearchResults:
+    """Résultats d'une recherche, classés à la demande
+    
+    Une requête d'un ou deux caractères correspond à presque tout le catalogue ;
+    la liste virtualisée n'en lit qu'une fenêtre, seules les positions
+    nécessaires sont donc classées (le reste l'est si on fait défiler).
+    """
+    def __init__(self, games, count, positions):
+        self.games = games
+        self.count = count
+        self.positions = positions
+        self.order = []
+    
+    def __len__(self):
+        return self.count
+    
+    def _ensure(self, end):
+        missing = min(end, self.count) - len(self.order)
+        if missing > 0:
+            self.order.extend(itertools.islice(self.positions, missing))
+    
+    def __getitem__(self, index):
+        games = self.games
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            self._ensure(stop)
+            return [games[p] for p in self.order[start:stop:step]]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("search result index out of range")
+        self._ensure(index + 1)
+        return games[self.order[index]]
+    
+    def __iter__(self):
+        self._ensure(self.count)
+        return (self.games[p] for p in self.order)
+
+def index_catalog(games):
+    """Trie le catalogue et construit son index (à appeler hors du thread Tk)"""
+    games = sorted(games, key=lambda x: x.name)
+    return games, SearchIndex(games)
+
+class VirtualListbox(tk.Frame):
+    """Liste virtualisée : seules les lignes visibles existent dans le Listbox
+    
+    Les éléments restent dans une séquence Python et sont formatés à la volée,
+    une mise à jour coûte donc le nombre de lignes visibles, pas la taille de la
+    liste. Expose curselection() et l'événement <<ListboxSelect>> comme tk.Listbox.
+    En mode "extended", Ctrl+clic et Maj+clic sélectionnent plusieurs lignes,
+    même hors de la fenêtre visible.
+    """
+    def __init__(self, master, formatter=str, selectmode="browse", **listbox_options):
+        bg = listbox_options.get("bg", master.cget("bg"))
+        super().__init__(master, bg=bg)
+        self.items = []
+        self.formatter = formatter
+        self.selectmode = selectmode
+        self.top = 0
+        self.rows = 1
+        self.selected = None
+        self.selection = set()
+        self.anchor = None
+        
+        self.scrollbar = tk.Scrollbar(self, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        self.listbox = tk.Listbox(self, exportselection=False, activestyle="none", **listbox_options)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        
+        self.listbox.bind('<Configure>', self.on_resize)
+        # La sélection est gérée ici, sur les indices de la liste complète
+        self.listbox.bind('<Button-1>', lambda e: self.on_click(e, "set"))
+        self.listbox.bind('<Control-Button-1>', lambda e: self.on_click(e, "toggle"))
+        self.listbox.bind('<Shift-Button-1>', lambda e: self.on_click(e, "range"))
+        self.listbox.bind('<B1-Motion>', lambda e: "break")
+        self.listbox.bind('<MouseWheel>', self.on_mousewheel)
+        self.listbox.bind('<Button-4>', lambda e: self.scroll_rows(-3))
+        self.listbox.bind('<Button-5>', lambda e: self.scroll_rows(3))
+        self.listbox.bind('<Up>', lambda e: self.move_selection(-1))
+        self.listbox.bind('<Down>', lambda e: self.move_selection(1))
+        self.listbox.bind('<Prior>', lambda e: self.move_selection(-self.rows))
+        self.listbox.bind('<Next>', lambda e: self.move_selection(self.rows))
+    
+    def set_items(self, items):
+        """Remplace les éléments affichés (la séquence n'est pas copiée)"""
+        self.items = items
+        self.top = 0
+        self.selected = None
+        self.selection = set()
+        self.anchor = None
+        self.render()
+    
+    def refresh(self):
+        """Redessine la fenêtre visible (éléments ajoutés ou modifiés)"""
+        self.top = max(0, min(self.top, len(self.items) - self.rows))
+        self.render()
+    
+    def render(self):
+        window = self.items[self.top:self.top + self.rows]
+        self.listbox.delete(0, tk.END)
+        if window:
+            self.listbox.insert(tk.END, *[self.formatter(item) for item in window])
+        for index in range(self.top, self.top + len(window)):
+            if index in self.selection:
+                self.listbox.selection_set(index - self.top)
+        
+        count = len(self.items)
+        if count:
+            self.scrollbar.set(self.top / count, min(1.0, (self.top + self.rows) / count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+    
+    def on_resize(self, event):
+        line_height = max(1, tk.font.Font(font=self.listbox.cget("font")).metrics("linespace") + 1)
+        rows = max(1, event.height // line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.refresh()
+    
+    def yview(self, *args):
+        """Commande de la barre de défilement (moveto / scroll)"""
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.items))
+            self.refresh()
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.rows if args[2] == "pages" else 1)
+            self.scroll_rows(step)
+    
+    def scroll_rows(self, step):
+        self.top += step
+        self.refresh()
+        return "break"
+    
+    def on_mousewheel(self, event):
+        return self.scroll_rows(-3 if event.delta > 0 else 3)
+    
+    def on_click(self, event, mode):
+        """Clic simple, Ctrl+clic (ajout/retrait) ou Maj+clic (plage)"""
+        self.listbox.focus_set()
+        row = self.listbox.nearest(event.y)
+        index = self.top + row
+        if not self.items or index >= len(self.items):
+            return "break"
+        
+        if self.selectmode != "extended" or mode == "set" or self.anchor is None:
+            self.selection = {index}
+            self.anchor = index
+        elif mode == "toggle":
+            self.selection ^= {index}
+            self.anchor = index
+        else:
+            low, high = sorted((self.anchor, index))
+            self.selection = set(range(low, high + 1))
+        
+        self.selected = index
+        self.render()
+        self.event_generate('<<ListboxSelect>>')
+        return "break"
+    
+    def move_selection(self, step):
+        """Déplace la sélection au clavier en faisant défiler si besoin"""
+        if not self.items:
+            return "break"
+        current = self.selected if self.selected is not None else self.top - 1
+        self.selected = max(0, min(len(self.items) - 1, current + step))
+        self.selection = {self.selected}
+        self.anchor = self.selected
+        if self.selected < self.top:
+            self.top = self.selected
+        elif self.selected >= self.top + self.rows:
+            self.top = self.selected - self.rows + 1
+        self.refresh()
+        self.event_generate('<<ListboxSelect>>')
+        return "break"
+    
+    def curselection(self):
+        """Indices sélectionnés dans la liste complète"""
+        return tuple(sorted(self.selection))
+    
+    def selected_items(self):
+        """Éléments sélectionnés et élément courant, pour les retrouver après une modification"""
+        chosen = [self.items[index] for index in self.curselection() if index < len(self.items)]
+        current = None
+        if self.selected is not None and self.selected < len(self.items):
+            current = self.items[self.selected]
+        return chosen, current
+    
+    def reselect(self, chosen, current=None):
+        """Resélectionne des éléments par identité après un ajout ou une suppression
+        
+        Les indices mémorisés ne valent plus rien dès que des lignes sont insérées
+        ou retirées avant eux ; les éléments disparus sont simplement oubliés.
+        """
+        positions = {id(item): index for index, item in enumerate(self.items)}
+        self.selection = {positions[id(item)] for item in chosen if id(item) in positions}
+        self.selected = positions.get(id(current)) if current is not None else None
+        self.anchor = self.selected
+        self.render()
+
+@functools.lru_cache(maxsize=256)
+def encode_qr_matrix(data, error_correction=qrcode.constants.ERROR_CORRECT_L):
+    """Encode une URL en matrice QR (bordure comprise), gardée en cache LRU"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=error_correction,
+        box_size=1,
+        border=QR_BORDER,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return tuple(tuple(row) for row in qr.get_matrix())
+
+def qr_capacity_bytes(version, error_correction):
+    """Nombre d'octets que contient un QR de cette version en mode octet"""
+    bits = qrcode.util.BIT_LIMIT_TABLE[error_correction][version]
+    bits -= 4 + qrcode.util.length_in_bits(qrcode.util.MODE_8BIT_BYTE, version)
+    return max(0, bits // 8)
+
+def pack_urls_into_qr(urls, max_version=QR_BUNDLE_MAX_VERSION,
+                      error_correction=qrcode.constants.ERROR_CORRECT_L):
+    """Répartit des URLs (une par ligne, format FBI) dans le moins de QR possible
+    
+    Rangement "first fit decreasing" sur la taille en octets : chaque URL va dans
+    le premier lot où elle tient sans dépasser max_version. Une URL trop longue
+    pour max_version a son propre QR.
+    """
+    capacity = qr_capacity_bytes(max_version, error_correction)
+    packs = []
+    sizes = []
+    for url in sorted(urls, key=lambda u: len(u.encode("utf-8")), reverse=True):
+        size = len(url.encode("utf-8"))
+        for i, used in enumerate(sizes):
+            # +1 pour le retour à la ligne qui sépare les URLs
+            if used + 1 + size <= capacity:
+                packs[i].append(url)
+                sizes[i] = used + 1 + size
+                break
+        else:
+            packs.append([url])
+            sizes.append(size)
+    return packs
+
+def render_qr_image(matrix, size):
+    """Dessine la matrice avec un nombre entier de pixels par module (sans dépasser size)"""
+    modules = len(matrix)
+    scale = max(1, size // modules)
+    pixels = bytes(0 if cell else 255 for row in matrix for cell in row)
+    img = Image.frombytes("L", (modules, modules), pixels)
+    if scale > 1:
+        img = img.resize((modules * scale, modules * scale), Image.Resampling.NEAREST)
+    return img
+
+class CatalogEntry:
+    """Entrée du catalogue, partagée par le dossier local, les index distants,
+    la recherche et l'export
+    
+    __slots__ : pas de dictionnaire par entrée, ce qui compte sur des
+    catalogues de 100 000 jeux.
+    """
+    __slots__ = ('name', 'region', 'type', 'filename', 'download_url',
+                 'title_id', 'product_code', 'version', 'title',
+                 'size', 'last_modified', 'available')
+    
+    # Champs enregistrés dans le cache des catalogues (les autres sont recalculés)
+    ROW_FIELDS = ('name', 'region', 'type', 'filename', 'download_url',
+                  'title_id', 'product_code', 'version', 'title')
+    
+    def __init__(self, name, region, file_type, filename, download_url):
+        self.name = name
+        self.region = region
+        self.type = file_type
+        self.filename = filename
+        self.download_url = download_url
+        self.title_id = None
+        self.product_code = None
+        self.version = None
+        # Titre anglais du SMDH (nom officiel, le nom affiché vient du fichier)
+        self.title = None
+        # Résultat de la vérification du lien (None : pas encore vérifié)
+        self.size = None
+        self.last_modified = None
+        self.available = None
+    
+    def to_row(self):
+        return [getattr(self, field) for field in self.ROW_FIELDS]
+    
+    @classmethod
+    def from_row(cls, row):
+        if isinstance(row, dict):
+            # Cache écrit par une version précédente (un dictionnaire par jeu)
+            row = [row.get(field) for field in cls.ROW_FIELDS]
+        entry = cls.__new__(cls)
+        for field, value in itertools.zip_longest(cls.ROW_FIELDS, row):
+            setattr(entry, field, value)
+        entry.size = None
+        entry.last_modified = None
+        entry.available = None
+        return entry
+    
+    def with_url(self, download_url):
+        """Copie de l'entrée avec une autre URL de téléchargement"""
+        entry = copy.copy(self)
+        entry.download_url = download_url
+        return entry
+    
+    def apply_metadata(self, info):
+        """Complète l'entrée avec les métadonnées lues dans les en-têtes du fichier"""
+        self.region = info.get('region', self.region)
+        self.title_id = info.get('title_id')
+        self.product_code = info.get('product_code')
+        self.version = info.get('version')
+        self.title = info.get('title')
+    
+    def __repr__(self):
+        return f"CatalogEntry({self.name!r}, {self.region!r}, {self.type!r}, {self.download_url!r})"
+
+def parse_game_filename(filename):
+    """Nom affiché, région devinée et type d'un fichier de jeu (None si ce n'en est pas un)"""
+    match = GAME_FILE_RE.match(filename)
+    if match is None:
+        return None
+    stem, extension = match.groups()
+    name = stem.translate(NAME_SEPARATORS).strip()
+    
+    # Une seule mise en majuscules par nom, motifs précompilés
+    upper = name.upper()
+    region = 'Unknown'
+    for candidate, pattern in REGION_PATTERNS:
+        if pattern.search(upper):
+            region = candidate
+            break
+    return name, region, extension.upper()
+
+def scan_local_folder(folder, base_url, references=None, metadata=None):
+    """Liste les jeux d'un dossier local (et ceux ajoutés par référence) avec leur URL"""
+    filenames = os.listdir(folder)
+    paths = {name: os.path.join(folder, name) for name in filenames}
+    if references is not None:
+        for name, _ in references.items():
+            if name not in paths:
+                target = references.resolve(name)
+                if target:
+                    filenames.append(name)
+                    paths[name] = target
+    
+    infos = {}
+    if metadata is not None:
+        infos = metadata.lookup_many(
+            paths[name] for name in filenames if name.lower().endswith(GAME_EXTENSIONS)
+        )
+    
+    games = []
+    for filename in filenames:
+        game = build_local_game(filename, base_url, infos.get(paths[filename]))
+        if game:
+            games.append(game)
+    return games
+
+def build_local_game(filename, base_url, info=None):
+    """Construit l'entrée d'un fichier du dossier local (None si ce n'est pas un jeu)
+    
+    info : métadonnées lues dans les en-têtes ; leur région remplace celle
+    devinée d'après le nom du fichier.
+    """
+    parsed = parse_game_filename(filename)
+    if parsed is None:
+        return None
+    name, region, file_type = parsed
+    game = CatalogEntry(name, region, file_type, filename, f"{base_url}/{filename}")
+    if info:
+        game.apply_metadata(info)
+    return game
+
+def build_remote_game(href, url):
+    """Construit l'entrée d'un jeu à partir d'un lien de l'index distant"""
+    filename = os.path.basename(href)
+    parsed = parse_game_filename(filename)
+    if parsed is None:
+        return None
+    name, region, file_type = parsed
+    
+    if href.startswith('http'):
+        download_url = href
+    elif href.startswith('/'):
+        # Chemin absolu sur le même serveur
+        download_url = urllib.parse.urljoin(url, href)
+    else:
+        download_url = f"{url.rstrip('/')}/{href.lstrip('/')}"
+    return CatalogEntry(name, region, file_type, filename, download_url)
+
+def iter_index_games(response, url, cancel=None, progress=None, directories=None):
+    """Génère les jeux d'un index distant au fur et à mesure du téléchargement
+    
+    La réponse (requests, stream=True) est décodée et analysée par blocs :
+    l'index n'est jamais chargé en entier en mémoire. Les liens de
+    sous-dossiers sont ajoutés à directories si une liste est donnée.
+    """
+    encoding = response.encoding or "utf-8"
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        encoding = "utf-8"
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    parser = IndexLinkParser(directories)
+    received = 0
+    
+    for chunk in response.iter_content(INDEX_CHUNK_SIZE):
+        if cancel is not None and cancel.is_set():
+            response.close()
+            return
+        received += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        for href in parser.take_links():
+            game = build_remote_game(href, url)
+            if game:
+                yield game
+        if progress:
+            progress(received)
+    
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    for href in parser.take_links():
+        game = build_remote_game(href, url)
+        if game:
+            yield game
+
+def load_remote_catalog(url):
+    """Télécharge et analyse un index distant (sans interface)"""
+    response = requests.get(url, timeout=30, stream=True)
+    response.raise_for_status()
+    return list(iter_index_games(response, url))
+
+class IndexCrawler:
+    """Parcourt un index distant et ses sous-dossiers
+    
+    Seuls les liens vers des sous-dossiers de la page de départ (même origine,
+    chemin en dessous) sont suivis, jusqu'à max_depth niveaux. Chaque URL n'est
+    visitée qu'une fois ; au plus workers pages sont lues en même temps, dont
+    per_host sur un même hôte, espacées d'au moins delay secondes.
+    """
+    def __init__(self, max_depth=CRAWL_MAX_DEPTH, workers=CRAWL_WORKERS,
+                 per_host=CRAWL_PER_HOST, delay=CRAWL_DELAY):
+        self.max_depth = max_depth
+        self.workers = workers
+        self.per_host = per_host
+        self.delay = delay
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.lock = threading.Lock()
+        self.host_slots = {}
+        self.host_next = {}
+        self.pages = 0
+        self.errors = []
+    
+    def wait_for_host(self, host):
+        """Prend une place pour l'hôte et respecte le délai entre deux requêtes"""
+        with self.lock:
+            slot = self.host_slots.get(host)
+            if slot is None:
+                slot = self.host_slots[host] = threading.BoundedSemaphore(self.per_host)
+        slot.acquire()
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.host_next.get(host, now))
+            self.host_next[host] = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+        return slot
+    
+    def fetch_page(self, url, on_games, cancel):
+        """Lit une page : envoie ses jeux par lots et retourne ses sous-dossiers"""
+        directories = []
+        slot = self.wait_for_host(urllib.parse.urlsplit(url).netloc)
+        try:
+            if cancel is not None and cancel.is_set():
+                return directories
+            # with : la connexion revient au pool même si la lecture s'arrête en route
+            with self.session.get(url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                batch = []
+                for game in iter_index_games(response, url, cancel, directories=directories):
+                    batch.append(game)
+                    if len(batch) >= REMOTE_BATCH_SIZE:
+                        on_games(batch)
+                        batch = []
+                if batch:
+                    on_games(batch)
+        finally:
+            slot.release()
+        return [urllib.parse.urljoin(url, href) for href in directories]
+    
+    def crawl(self, url, on_games, cancel=None, progress=None):
+        """Parcourt l'index ; seule une erreur sur la page de départ est levée"""
+        if not url.endswith('/'):
+            url += '/'
+        root = urllib.parse.urlsplit(url)
+        visited = {url}
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {pool.submit(self.fetch_page, url, on_games, cancel): (url, 0)}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page, depth = pending.pop(future)
+                    try:
+                        children = future.result()
+                    except requests.exceptions.RequestException as e:
+                        if page == url:
+                            raise
+                        self.errors.append((page, str(e)))
+                        continue
+                    self.pages += 1
+                    if progress:
+                        progress(self.pages, len(pending))
+                    if depth >= self.max_depth or (cancel is not None and cancel.is_set()):
+                        continue
+                    
+                    for child in children:
+                        child = urllib.parse.urldefrag(child)[0]
+                        parts = urllib.parse.urlsplit(child)
+                        if (parts.scheme, parts.netloc) != (root.scheme, root.netloc):
+                            continue
+                        if parts.query or not parts.path.startswith(root.path):
+                            continue
+                        if child in visited:
+                            continue
+                        visited.add(child)
+                        future = pool.submit(self.fetch_page, child, on_games, cancel)
+                        pending[future] = (child, depth + 1)
+    
+    def crawl_all(self, url, cancel=None):
+        """Liste complète des jeux trouvés (sans interface)"""
+        games = []
+        self.crawl(url, games.extend, cancel)
+        return games
+
+def fetch_catalog(url, cache, cancel=None, on_batch=None, progress=None):
+    """Catalogue complet d'une URL en passant par le cache
+    
+    Retourne (jeux, raison) : raison vaut "unchanged" (réponse 304), "offline"
+    (serveur injoignable, dernière version connue) ou None. on_batch(lot, total)
+    reçoit les jeux par lots pendant le téléchargement, progress(octets) l'avancée.
+    Seules les erreurs de connexion retombent sur le cache : une erreur HTTP ou
+    un flux coupé est levé.
+    """
+    cached = cache.load(url)
+    headers = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+    
+    try:
+        response = requests.get(url, timeout=30, stream=True, headers=headers)
+        if response.status_code == 304 and cached:
+            response.close()
+            cache.touch(url)
+            return cached[2], "unchanged"
+        response.raise_for_status()
+        games = []
+        batch = []
+        for game in iter_index_games(response, url, cancel, progress):
+            games.append(game)
+            batch.append(game)
+            if on_batch and len(batch) >= REMOTE_BATCH_SIZE:
+                on_batch(batch, len(games))
+                batch = []
+        if on_batch and batch and (cancel is None or not cancel.is_set()):
+            on_batch(batch, len(games))
+    except OFFLINE_ERRORS:
+        if cached:
+            return cached[2], "offline"
+        raise
+    
+    if cancel is None or not cancel.is_set():
+        cache.store(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), games)
+    return games, None
+
+def source_priority(url):
+    """Priorité d'une source pour les doublons : 1 sur le réseau local, 2 sur Internet"""
+    host = urllib.parse.urlsplit(url).hostname or ""
+    if host == "localhost" or host.endswith(".local"):
+        return 1
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return 2
+    return 1 if address.is_private or address.is_loopback else 2
+
+class CatalogMerger:
+    """Fusionne plusieurs sources en un seul catalogue sans doublons
+    
+    Deux entrées sont le même jeu si elles ont le même title ID ou le même
+    nom/région/type normalisés. Pour un doublon, on garde l'entrée de la source
+    de plus petite priorité (0 : dossier local, 1 : réseau local, 2 : Internet).
+    """
+    def __init__(self):
+        self.games = []
+        # clé -> [priorité, position dans self.games]
+        self.slots = {}
+        self.duplicates = 0
+    
+    @staticmethod
+    def keys(game):
+        name_key = (" ".join(game.name.casefold().split()), game.region, game.type)
+        if game.title_id:
+            return (game.title_id, name_key)
+        return (name_key,)
+    
+    def add(self, games, priority):
+        """Fusionne une source ; retourne (jeux ajoutés en fin de liste,
+        [(position, jeu)] remplacés par une source prioritaire)"""
+        appended = []
+        replaced = []
+        for game in games:
+            keys = self.keys(game)
+            slot = None
+            for key in keys:
+                slot = self.slots.get(key)
+                if slot is not None:
+                    break
+            
+            if slot is None:
+                slot = [priority, len(self.games)]
+                self.games.append(game)
+                appended.append(game)
+            else:
+                self.duplicates += 1
+                if priority < slot[0]:
+                    slot[0] = priority
+                    self.games[slot[1]] = game
+                    replaced.append((slot[1], game))
+            for key in keys:
+                self.slots.setdefault(key, slot)
+        return appended, replaced
+
+def detect_local_ip():
+    """Obtient l'adresse IP locale"""
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.connect(("8.8.8.8", 80))
+        ip = s.getsockname()[0]
+        s.close()
+        return ip
+    except:
+        return "127.0.0.1"
+
+class NetworkInterfaces:
+    """Adresses IPv4 de la machine, détectées une fois puis gardées en cache
+    
+    refresh() relit les interfaces (au démarrage, à la demande ou périodiquement) ;
+    current() retourne l'adresse choisie par l'utilisateur, sinon l'adresse de
+    la route par défaut.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.addresses = []
+        self.selected = None
+        self.refresh()
+    
+    def detect(self):
+        addresses = []
+        # Adresse de la route par défaut (aucun paquet n'est envoyé en UDP)
+        primary = detect_local_ip()
+        if primary != "127.0.0.1":
+            addresses.append(primary)
+        try:
+            infos = socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET)
+        except (socket.gaierror, UnicodeError):
+            infos = []
+        for info in infos:
+            address = info[4][0]
+            if not address.startswith("127.") and address not in addresses:
+                addresses.append(address)
+        return addresses or ["127.0.0.1"]
+    
+    def refresh(self):
+        """Relit les interfaces ; retourne True si l'adresse utilisée a changé"""
+        addresses = self.detect()
+        with self.lock:
+            before = self._current()
+            self.addresses = addresses
+            return self._current() != before
+    
+    def _current(self):
+        if self.selected in self.addresses:
+            return self.selected
+        return self.addresses[0] if self.addresses else "127.0.0.1"
+    
+    def current(self):
+        with self.lock:
+            return self._current()
+    
+    def select(self, address):
+        with self.lock:
+            self.selected = address
+    
+    def choices(self):
+        with self.lock:
+            return list(self.addresses)
+
+def qr_file_name(game):
+    """Nom de fichier PNG du QR code d'un jeu"""
+    safe_name = "".join(c for c in game.name if c.isalnum() or c in (' ', '-', '_'))
+    return f"{safe_name}_QR.png"
+
+def export_qr_png(task):
+    """Écrit le PNG d'un QR code (exécuté dans un processus du pool)"""
+    url, path = task
+    matrix = encode_qr_matrix(url)
+    img = render_qr_image(matrix, len(matrix) * 10)
+    img.convert("1").save(path)
+    return path
+
+def export_catalog(games, output_dir, workers=None, log=print):
+    """Exporte le QR code de chaque jeu en PNG, en sautant ceux déjà à jour
+    
+    qr_manifest.json garde l'URL de chaque PNG écrit : un jeu dont l'URL n'a pas
+    changé depuis le dernier export n'est pas régénéré.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, "qr_manifest.json")
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    
+    # Deux jeux au même nom (régions, types) : le premier par URL garde le nom,
+    # les autres prennent un suffixe tiré de leur URL (stable quel que soit l'ordre)
+    groups = {}
+    for game in games:
+        groups.setdefault(qr_file_name(game), set()).add(game.download_url)
+    
+    tasks = []
+    exported = {}
+    skipped = 0
+    for filename, urls in groups.items():
+        stem = filename[:-len("_QR.png")]
+        for position, url in enumerate(sorted(urls)):
+            if position:
+                digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:8]
+                filename = f"{stem} ({digest})_QR.png"
+            exported[filename] = url
+            path = os.path.join(output_dir, filename)
+            if manifest.get(filename) == url and os.path.exists(path):
+                skipped += 1
+            else:
+                tasks.append((url, path))
+    
+    written = 0
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for _ in pool.map(export_qr_png, tasks, chunksize=16):
+                written += 1
+                if written % 100 == 0:
+                    log(f"{written}/{len(tasks)} QR code(s) written")
+    
+    # PNG d'un export précédent dont le jeu n'est plus dans le catalogue
+    removed = 0
+    for filename in manifest.keys() - exported.keys():
+        try:
+            os.remove(os.path.join(output_dir, os.path.basename(filename)))
+            removed += 1
+        except FileNotFoundError:
+            pass
+    
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(exported, f, indent=1)
+    os.replace(tmp_path, manifest_path)
+    
+    log(f"{written} QR code(s) written, {skipped} unchanged, {removed} removed, in {output_dir}")
+    return written, skipped
+
+def load_sheet_font(size):
+    """Police des légendes (police par défaut de Pillow)"""
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 : taille fixe
+        return ImageFont.load_default()
+
+def fit_text(draw, text, font, width):
+    """Coupe le texte avec "..." pour qu'il tienne dans la largeur donnée"""
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "...", font=font) > width:
+        text = text[:-1]
+    return text + "..."
+
+def iter_contact_sheets(games, columns=SHEET_COLUMNS, rows=SHEET_ROWS,
+                        page_size=SHEET_PAGE_SIZE, margin=SHEET_MARGIN):
+    """Génère les pages de la planche une par une
+    
+    Une seule page est en mémoire à la fois : le nombre de jeux ne change pas
+    la mémoire utilisée.
+    """
+    per_page = columns * rows
+    pages = max(1, -(-len(games) // per_page))
+    width, height = page_size
+    cell_width = (width - 2 * margin) // columns
+    cell_height = (height - 2 * margin) // rows
+    title_font = load_sheet_font(30)
+    info_font = load_sheet_font(24)
+    text_height = 80
+    qr_size = min(cell_width, cell_height - text_height) - 20
+    
+    for page in range(pages):
+        sheet = Image.new("L", page_size, 255)
+        draw = ImageDraw.Draw(sheet)
+        draw.text((margin, margin // 3), f"3DS QR codes - page {page + 1}/{pages}",
+                  font=info_font, fill=0)
+        
+        for slot, game in enumerate(games[page * per_page:(page + 1) * per_page]):
+            x = margin + (slot % columns) * cell_width
+            y = margin + (slot // columns) * cell_height
+            
+            qr = render_qr_image(encode_qr_matrix(game.download_url), qr_size)
+            sheet.paste(qr, (x + (cell_width - qr.width) // 2, y))
+            
+            text_y = y + qr.height + 6
+            title = fit_text(draw, game.name, title_font, cell_width - 20)
+            draw.text((x + cell_width // 2, text_y), title, font=title_font, fill=0, anchor="mt")
+            info = f"{game.region} - {game.type}"
+            draw.text((x + cell_width // 2, text_y + 38), info, font=info_font, fill=80, anchor="mt")
+        
+        yield page + 1, pages, sheet
+
+def export_contact_sheets(games, output_path, progress=None):
+    """Écrit les planches en PDF (une page ajoutée à la fois) ou en PNG numérotés"""
+    is_pdf = output_path.lower().endswith(".pdf")
+    stem, ext = os.path.splitext(output_path)
+    written = []
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    
+    for page, pages, sheet in iter_contact_sheets(games):
+        if is_pdf:
+            sheet.save(output_path, "PDF", resolution=300, append=page > 1)
+        else:
+            path = f"{stem}_{page:03d}{ext or '.png'}"
+            sheet.save(path)
+            written.append(path)
+        sheet.close()
+        if progress:
+            progress(page, pages)
+    
+    return [output_path] if is_pdf else written
+
+def user_cache_dir():
+    """Dossier de cache de l'utilisateur pour les exports sans interface"""
+    base = (os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+            or os.path.join(os.path.expanduser("~"), ".cache"))
+    path = os.path.join(base, "3ds_qr_generator")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def main_cli(argv):
+    """Export des QR codes en ligne de commande, sans interface graphique"""
+    parser = argparse.ArgumentParser(
+        description="Export the QR code of every game of a catalog as PNG files"
+    )
+    parser.add_argument("--export", metavar="DIR",
+                        help="output folder for the PNG files")
+    parser.add_argument("--sheet", metavar="FILE",
+                        help="printable contact sheets (.pdf, or .png numbered per page)")
+    parser.add_argument("--source", default="local",
+                        help="'local' for the 3ds_files folder, or the URL of a remote index")
+    parser.add_argument("--folder", default=os.path.join(os.getcwd(), "3ds_files"),
+                        help="local folder to export (with --source local)")
+    parser.add_argument("--base-url", default=None,
+                        help="base URL of the local server (default: http://<local ip>:8000)")
+    parser.add_argument("--depth", type=int, default=0,
+                        help="also read subfolders of a remote index, up to this depth")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of processes (default: number of CPUs)")
+    args = parser.parse_args(argv)
+    if not args.export and not args.sheet:
+        parser.error("use --export and/or --sheet")
+    
+    try:
+        if args.source == "local":
+            base_url = args.base_url or f"http://{detect_local_ip()}:8000"
+            try:
+                metadata = TitleMetadataCache(os.path.join(user_cache_dir(), "catalog_cache.db"))
+            except sqlite3.Error:
+                metadata = None
+            games = scan_local_folder(args.folder, base_url.rstrip('/'), metadata=metadata)
+        elif args.depth:
+            games = IndexCrawler(max_depth=args.depth).crawl_all(args.source)
+        else:
+            games = load_remote_catalog(args.source)
+    except (OSError, requests.exceptions.RequestException) as e:
+        print(f"Error in the loading: {e}", file=sys.stderr)
+        return 1
+    
+    games.sort(key=lambda x: x.name)
+    print(f"{len(games)} game(s) in the catalog")
+    if args.export:
+        export_catalog(games, args.export, workers=args.workers)
+    if args.sheet:
+        files = export_contact_sheets(
+            games, args.sheet,
+            progress=lambda page, pages: print(f"page {page}/{pages}", end="\r")
+        )
+        print(f"\n{len(files)} file(s) written: {args.sheet}")
+    return 0
+
+class LinkProber:
+    """Vérifie les liens du catalogue par requêtes HEAD (taille, date, disponibilité)
+    
+    Une seule requests.Session partagée garde les connexions ouvertes entre les
+    requêtes ; les résultats sont gardés dans SQLite pour PROBE_TTL secondes.
+    """
+    def __init__(self, db_path, max_workers=PROBE_WORKERS, ttl=PROBE_TTL):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        db = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS probes ("
+                " url TEXT PRIMARY KEY,"
+                " size INTEGER,"
+                " last_modified TEXT,"
+                " available INTEGER,"
+                " checked_at REAL)"
+            )
+            db.commit()
+        finally:
+            db.close()
+    
+    def probe(self, url):
+        """Interroge une URL et retourne {'size', 'last_modified', 'available'}"""
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=15)
+            if response.status_code in (405, 501):
+                # Serveur sans HEAD : GET dont on ne lit que les en-têtes
+                response = self.session.get(url, stream=True, timeout=15)
+                response.close()
+        except requests.exceptions.RequestException:
+            return {'size': None, 'last_modified': None, 'available': False}
+        
+        length = response.headers.get('Content-Length')
+        return {
+            'size': int(length) if length and length.isdigit() else None,
+            'last_modified': response.headers.get('Last-Modified'),
+            'available': response.ok,
+        }
+    
+    def cached(self, urls):
+        """Résultats encore valides du cache pour ces URLs"""
+        results = {}
+        limit = time.time() - self.ttl
+        db = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            urls = list(urls)
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                rows = db.execute(
+                    "SELECT url, size, last_modified, available FROM probes"
+                    f" WHERE checked_at >= ? AND url IN ({','.join('?' * len(chunk))})",
+                    [limit] + chunk
+                )
+                for url, size, last_modified, available in rows:
+                    results[url] = {
+                        'size': size, 'last_modified': last_modified, 'available': bool(available)
+                    }
+        finally:
+            db.close()
+        return results
+    
+    def store(self, results):
+        db = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            now = time.time()
+            db.executemany(
+                "INSERT OR REPLACE INTO probes (url, size, last_modified, available, checked_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [(url, r['size'], r['last_modified'], int(r['available']), now)
+                 for url, r in results]
+            )
+            db.commit()
+        finally:
+            db.close()
+    
+    def probe_all(self, urls, on_results, cancel):
+        """Vérifie toutes les URLs ; on_results reçoit des lots [(url, résultat)]"""
+        cached = self.cached(urls)
+        if cached:
+            on_results(list(cached.items()))
+        
+        pending = [url for url in urls if url not in cached]
+        batch = []
+        last_flush = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.probe, url): url for url in pending}
+            for future in as_completed(futures):
+                if cancel.is_set():
+                    for other in futures:
+                        other.cancel()
+                    break
+                batch.append((futures[future], future.result()))
+                if len(batch) >= 50 or time.monotonic() - last_flush > 0.3:
+                    self.store(batch)
+                    on_results(batch)
+                    batch = []
+                    last_flush = time.monotonic()
+        if batch:
+            self.store(batch)
+            on_results(batch)
+
+def format_size(size):
+    """Formate une taille de fichier lisible"""
+    if size is None:
+        return "?"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def format_rate(bytes_per_second):
+    """Formate un débit lisible (Ko/s, Mo/s)"""
+    if bytes_per_second >= 1024 * 1024:
+        return f"{bytes_per_second / (1024 * 1024):.1f} MB/s"
+    return f"{bytes_per_second / 1024:.0f} KB/s"
+
 class QRCodeGenerator:
     def __init__(self, root):
         self.root = root
@@ -30,56 +2692,192 @@ class QRCodeGenerator:
         
         self.games = []
         self.filtered_games = []
+        self.search_index = SearchIndex()
+        # Changements du dossier local appliqués (réindexation en arrière-plan)
+        self.folder_changes = 0
+        self._search_timer = None
         self.selected_game = None
         self.qr_image = None
+        self.qr_photo_cache = OrderedDict()
+        self._qr_key = None
+        
+        # Lots d'URLs (plusieurs installations FBI en un seul scan)
+        self.bundle_var = tk.BooleanVar(value=True)
+        self.max_version_var = tk.IntVar(value=QR_BUNDLE_MAX_VERSION)
+        self.ec_var = tk.StringVar(value="L")
+        self.bundle_pages = []
+        self.bundle_page = 0
+        self.bundle_names = {}
         
         # Serveur local
         self.server = None
         self.server_thread = None
         self.server_running = False
         self.server_port = 8000
-        self.local_files_dir = os.path.join(os.getcwd(), "3ds_files")
+        self.max_workers_var = tk.IntVar(value=8)
+        self.short_links_var = tk.BooleanVar(value=False)
+        self.proxy_var = tk.BooleanVar(value=False)
+        self.proxy_cache_gb_var = tk.IntVar(value=20)
+        self.global_rate_var = tk.IntVar(value=0)
+        self.client_rate_var = tk.IntVar(value=0)
+        self.max_connections_var = tk.IntVar(value=6)
+        self.scheduler = TransferScheduler()
+        self.apply_transfer_limits()
+        self._status_timer = None
+        self.app_dir = os.getcwd()
+        self.local_files_dir = os.path.join(self.app_dir, "3ds_files")
+        # Fichiers ajoutés sans copie (hors du dossier 3ds_files)
+        self.references = ReferenceManifest(os.path.join(self.app_dir, "references.json"))
+        self.add_mode_var = tk.StringVar(value="reference")
+        self.copy_cancel = None
+        self.showing_local = False
         
         # Créer le dossier local s'il n'existe pas
         if not os.path.exists(self.local_files_dir):
             os.makedirs(self.local_files_dir)
         
+        # Adresse réseau détectée une seule fois (rafraîchie périodiquement)
+        self.network = NetworkInterfaces()
+        self._interfaces_refreshing = False
+        self.interface_var = tk.StringVar(value=self.network.current())
+        
         # URLs de serveurs prédéfinis
         self.preset_servers = {
-            "🏠 Serveur Local": f"{self.get_local_ip}{self.server_port}",
+            "🏠 Serveur Local": f"http://{self.get_local_ip()}:{self.server_port}",
             "Internet Archive - 3DS CIAs": "https://archive.org/download/nintendo3dscias",
             "personalize": ""
         }
         
         self.current_url = ""
         
+        # Chargement distant en arrière-plan
+        self.ui_queue = queue.Queue()
+        self.load_cancel = None
+        self.load_generation = 0
+        self.crawl_var = tk.BooleanVar(value=False)
+        self.crawl_depth_var = tk.IntVar(value=CRAWL_MAX_DEPTH)
+        
+        # Catalogues distants déjà chargés (consultables hors ligne)
+        try:
+            self.catalog_cache = CatalogCache(os.path.join(self.app_dir, "catalog_cache.db"))
+        except sqlite3.Error:
+            # Base illisible (corrompue, verrouillée, disque en lecture seule) : cache temporaire
+            self.catalog_cache = CatalogCache(
+                os.path.join(tempfile.mkdtemp(prefix="3ds_qr_"), "catalog_cache.db")
+            )
+        self.short_links = ShortLinks(self.catalog_cache.path)
+        
+        # Métadonnées lues dans les en-têtes des fichiers locaux
+        self.title_metadata = TitleMetadataCache(self.catalog_cache.path)
+        
+        # Vérification des liens en arrière-plan
+        self.link_prober = LinkProber(self.catalog_cache.path)
+        self.probe_cancel = None
+        
         # Créer l'interface
         self.create_widgets()
         
+        # Rouvrir le dernier catalogue connu, même sans réseau
+        self.restore_last_catalog()
+        
         # Bind pour redimensionner le QR code quand la fenêtre change
         self.root.bind('<Configure>', self.on_window_resize)
         
         # Gérer la fermeture de la fenêtre
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
+        # Résultats des threads de travail
+        self.root.after(UI_POLL_MS, self.process_ui_queue)
+        self.root.after(NETWORK_CHECK_MS, self.check_network)
+        
+        # Le catalogue local suit les fichiers ajoutés/supprimés dans 3ds_files
+        self.folder_watcher = FolderWatcher(
+            self.local_files_dir,
+            self.read_folder_changes
+        )
+        self.folder_watcher.start()
     
     def on_window_resize(self, event):
         """Redimensionne le QR code quand la fenêtre est redimensionnée"""
+        # <Configure> remonte aussi pour chaque widget enfant : seule la fenêtre compte
+        if event.widget is not self.root:
+            return
         if self.selected_game and hasattr(self, 'qr_canvas'):
             # Attendre un peu pour éviter trop de redimensionnements
             if hasattr(self, '_resize_timer'):
                 self.root.after_cancel(self._resize_timer)
             self._resize_timer = self.root.after(300, self.generate_qr_code)
     
-    def get_local_ip(self):
-        """Obtient l'adresse IP locale"""
+    def apply_transfer_limits(self, *args):
+        """Applique les limites de débit et de connexions (aussi serveur lancé)"""
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(("8.8.8.8", 80))
-            ip = s.getsockname()[0]
-            s.close()
-            return ip
-        except:
-            return "127.0.0.1"
+            global_rate = self.global_rate_var.get()
+            client_rate = self.client_rate_var.get()
+            max_connections = self.max_connections_var.get()
+        except tk.TclError:
+            # Champ en cours de saisie (vide ou invalide)
+            return
+        self.scheduler.configure(global_rate * 1024 * 1024, client_rate * 1024 * 1024, max_connections)
+    
+    def get_local_ip(self):
+        """Obtient l'adresse IP locale (celle de l'interface choisie, en cache)"""
+        return self.network.current()
+    
+    def check_network(self):
+        """Vérifie en arrière-plan si l'adresse réseau a changé"""
+        def worker():
+            if self.network.refresh():
+                self.post_ui(self.on_network_changed)
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(NETWORK_CHECK_MS, self.check_network)
+    
+    def on_interface_select(self, event=None):
+        self.network.select(self.interface_var.get())
+        self.on_network_changed()
+    
+    def refresh_interface_choices(self):
+        """Affiche la liste en cache et relit les interfaces en arrière-plan
+        
+        getaddrinfo(gethostname()) peut bloquer plusieurs secondes (DNS) : il ne
+        doit pas tourner dans le thread Tk à l'ouverture de la liste.
+        """
+        self.interface_combo.config(values=self.network.choices())
+        if self._interfaces_refreshing:
+            return
+        self._interfaces_refreshing = True
+        
+        def worker():
+            changed = self.network.refresh()
+            self.post_ui(self.on_interface_choices, changed)
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def on_interface_choices(self, changed):
+        self._interfaces_refreshing = False
+        self.interface_combo.config(values=self.network.choices())
+        if changed:
+            self.on_network_changed()
+    
+    def on_network_changed(self):
+        """Met à jour toutes les URLs locales avec la nouvelle adresse"""
+        old_base = self.preset_servers["🏠 Serveur Local"]
+        ip = self.get_local_ip()
+        base_url = f"http://{ip}:{self.server_port}"
+        self.preset_servers["🏠 Serveur Local"] = base_url
+        self.interface_var.set(ip)
+        
+        if self.url_entry.get().strip().rstrip('/') == old_base:
+            self.url_entry.delete(0, tk.END)
+            self.url_entry.insert(0, base_url)
+        
+        if self.showing_local:
+            for game in self.games:
+                game.download_url = f"{base_url}/{game.filename}"
+        
+        # Les QR courts et locaux contiennent l'adresse : on les refait
+        self._qr_key = None
+        if self.selected_game:
+            self.on_game_select(None)
+        self.game_listbox.refresh()
     
     def start_local_server(self):
         """Démarre le serveur HTTP local"""
@@ -93,8 +2891,18 @@ class QRCodeGenerator:
                 *args, directory=self.local_files_dir, **kwargs
             )
             
-            # Créer le serveur
-            self.server = socketserver.TCPServer(("", self.server_port), handler)
+            # Créer le serveur (une connexion par worker, plusieurs consoles en parallèle)
+            self.server = LocalHTTPServer(
+                ("", self.server_port), handler, max_workers=self.max_workers_var.get(),
+                scheduler=self.scheduler
+            )
+            self.server.short_links = self.short_links
+            self.server.references = self.references
+            if self.proxy_var.get():
+                self.server.proxy_cache = ProxyCache(
+                    os.path.join(self.app_dir, "proxy_cache"),
+                    max(1, self.proxy_cache_gb_var.get()) * 1024 ** 3
+                )
             
             # Démarrer le serveur dans un thread
             self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
@@ -115,10 +2923,36 @@ class QRCodeGenerator:
                 text=f" Server active in http://{local_ip}:{self.server_port}",
                 fg="#27ae60"
             )
+            self._status_timer = self.root.after(1000, self.refresh_server_status)
             
         except Exception as e:
             messagebox.showerror("Error", f"Impossible to start the server:\n{str(e)}")
     
+    def refresh_server_status(self):
+        """Affiche le débit de chaque connexion active"""
+        self._status_timer = None
+        if not self.server_running:
+            return
+        
+        active, last = self.server.transfer_snapshot()
+        stats = self.server.metrics.snapshot()
+        total_bytes = stats['total_bytes'] + sum(t.sent for t in active)
+        text = f" Server active in http://{self.get_local_ip()}:{self.server_port}"
+        text += f" | workers: {self.server.max_workers}"
+        text += f" | {stats['requests']} req, {format_size(total_bytes)}"
+        if stats['p50_ms'] is not None:
+            text += f", p50 {stats['p50_ms']:.0f} ms / p99 {stats['p99_ms']:.0f} ms"
+        if active:
+            text += f" | {len(active)} transfer(s): "
+            text += ", ".join(
+                f"{t.client} {format_rate(t.throughput)}" for t in active[:4]
+            )
+        elif last:
+            text += f" | last: {last.client} {format_rate(last.throughput)}"
+        self.server_status_label.config(text=text)
+        
+        self._status_timer = self.root.after(1000, self.refresh_server_status)
+    
     def stop_local_server(self):
         """Arrête le serveur HTTP local"""
         if not self.server_running:
@@ -126,6 +2960,9 @@ class QRCodeGenerator:
             return
         
         try:
+            if self._status_timer:
+                self.root.after_cancel(self._status_timer)
+                self._status_timer = None
             self.server.shutdown()
             self.server.server_close()
             self.server_running = False
@@ -144,7 +2981,7 @@ class QRCodeGenerator:
             self.start_local_server()
     
     def add_file_to_server(self):
-        """Ajoute un fichier au serveur local"""
+        """Ajoute un fichier au serveur local (par référence ou par copie)"""
         filenames = filedialog.askopenfilenames(
             title="select a file",
             filetypes=[
@@ -154,182 +2991,567 @@ class QRCodeGenerator:
         )
         
         if filenames:
-            copied = 0
+            copy_mode = self.add_mode_var.get() == "copy"
+            # Vérifié avant tout : un fichier existant ne doit pas être touché pour rien
+            if copy_mode and self.copy_cancel is not None:
+                messagebox.showinfo("Info", "a copy is already running")
+                return
+            added = 0
+            copies = []
             for filepath in filenames:
+                filename = os.path.basename(filepath)
                 try:
-                    import shutil
-                    filename = os.path.basename(filepath)
                     dest = os.path.join(self.local_files_dir, filename)
                     
-                    if os.path.exists(dest):
+                    # L'ancien fichier reste servi jusqu'au remplacement (os.replace)
+                    if os.path.exists(dest) or filename in self.references:
                         if not messagebox.askyesno("file exist", f"{filename} exist is already here.\nReplace ?"):
                             continue
                     
-                    shutil.copy2(filepath, dest)
-                    copied += 1
+                    if copy_mode:
+                        copies.append((filepath, dest))
+                    else:
+                        self.add_by_reference(filepath, dest)
+                        added += 1
                 except Exception as e:
                     messagebox.showerror("Error", f"Error in the copy of {filename}:\n{str(e)}")
             
-            if copied > 0:
-                messagebox.showinfo("Success", f"{copied} is added to the local server !")
-                # Recharger si on affiche déjà les fichiers locaux
-                if "localhost" in self.url_entry.get():
-                    self.load_local_files()
+            if copies:
+                self.start_background_copy(copies)
+            if added > 0:
+                messagebox.showinfo("Success", f"{added} is added to the local server !")
+                self.reload_local_view()
+    
+    def add_by_reference(self, source, dest):
+        """Publie un fichier sans le dupliquer : lien physique, reflink, sinon référence
+        
+        Le lien est créé sous un nom .part puis renommé sur dest : un fichier
+        existant est remplacé d'un coup, sans fenêtre où il manque.
+        """
+        name = os.path.basename(dest)
+        tmp_path = dest + ".part"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(source, tmp_path)
+            kind = "hardlink"
+        except OSError:
+            kind = "reflink" if try_reflink(source, tmp_path) else None
+        if kind:
+            os.replace(tmp_path, dest)
+            self.references.remove(name)
+            return kind
+        # Autre disque : le serveur lira le fichier à son emplacement d'origine
+        self.references.add(name, source)
+        if os.path.exists(dest):
+            # Un fichier local masquerait la référence
+            os.remove(dest)
+        return "reference"
+    
+    def start_background_copy(self, copies):
+        """Copie les fichiers dans un thread avec une barre de progression"""
+        if self.copy_cancel is not None:
+            messagebox.showinfo("Info", "a copy is already running")
+            return
+        
+        self.copy_cancel = threading.Event()
+        cancel = self.copy_cancel
+        total = sum(os.path.getsize(source) for source, _ in copies)
+        self.copy_progress.config(maximum=max(total, 1), value=0)
+        self.copy_cancel_btn.config(state="normal")
+        self.copy_frame.pack(pady=(0, 5), padx=10, fill="x")
+        
+        def worker():
+            copied = 0
+            done_before = 0
+            try:
+                for source, dest in copies:
+                    progress = lambda done, size, base=done_before: self.post_ui(
+                        self.on_copy_progress, base + done, total
+                    )
+                    copy_with_progress(source, dest, progress, cancel)
+                    self.references.remove(os.path.basename(dest))
+                    done_before += os.path.getsize(source)
+                    copied += 1
+            except InterruptedError:
+                pass
+            except Exception as e:
+                self.post_ui(messagebox.showerror, "Error", f"Error in the copy:\n{str(e)}")
+            finally:
+                self.post_ui(self.on_copy_finished, copied)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def cancel_copy(self):
+        """Interrompt la copie en cours (le fichier .part est supprimé)"""
+        if self.copy_cancel is not None:
+            self.copy_cancel.set()
+            self.copy_cancel_btn.config(state="disabled")
+            self.status_label.config(text="cancelling the copy...")
+    
+    def on_copy_progress(self, done, total):
+        self.copy_progress.config(value=done)
+        self.status_label.config(text=f"copy {format_size(done)} / {format_size(total)}")
+    
+    def on_copy_finished(self, copied):
+        self.copy_cancel = None
+        self.copy_frame.pack_forget()
+        if copied > 0:
+            self.status_label.config(text=f"{copied} file(s) copied to the local server")
+            self.reload_local_view()
+    
+    def reload_local_view(self):
+        """Recharger si on affiche déjà les fichiers locaux"""
+        url = self.url_entry.get()
+        if "localhost" in url or "127.0.0.1" in url or self.get_local_ip() in url:
+            self.load_local_files()
+    
+    def load_local_files(self):
+        """Charge les fichiers du serveur local (lecture et index dans un thread)"""
+        if self.load_cancel is not None:
+            self.cancel_remote_load()
+        
+        self.stop_probing()
+        self.load_generation += 1
+        generation = self.load_generation
+        base_url = f"http://{self.get_local_ip()}:{self.server_port}"
+        
+        def worker():
+            try:
+                games = scan_local_folder(
+                    self.local_files_dir, base_url, self.references, self.title_metadata
+                )
+                self.post_ui(self.on_local_loaded, generation, index_catalog(games), None)
+            except Exception as e:
+                self.post_ui(self.on_local_loaded, generation, None, str(e))
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def on_local_loaded(self, generation, catalog, error):
+        if generation != self.load_generation:
+            return
+        if error is not None:
+            messagebox.showerror("Error", f"Error in the loading :\n{error}")
+            return
+        
+        self.showing_local = True
+        self.refresh_catalog(catalog)
+        if len(self.games) == 0:
+            messagebox.showinfo("Aucun fichier", f"Aucun fichier trouvé dans:\n{self.local_files_dir}\n\nUtilisez le bouton '➕ Ajouter fichier(s)' pour ajouter des jeux.")
+        else:
+            self.status_label.config(text=f"✅ {len(self.games)} fichier(s) local(aux) chargé(s)")
+    
+    def open_local_folder(self):
+        """Ouvre le dossier local dans l'explorateur"""
+        if os.name == 'nt':  # Windows
+            os.startfile(self.local_files_dir)
+        elif os.name == 'posix':  # macOS et Linux
+            import subprocess
+            subprocess.call(['open' if sys.platform == 'darwin' else 'xdg-open', self.local_files_dir])
+    
+    def load_from_server(self):
+        """Charge la liste depuis le serveur configuré (ou annule le chargement en cours)"""
+        if self.load_cancel is not None:
+            self.cancel_remote_load()
+            return
+        
+        url = self.url_entry.get().strip()
+        
+        if not url:
+            messagebox.showwarning("warning", "enter a valid URL")
+            return
+        
+        # Si c'est le serveur local, charger directement
+        if "localhost" in url or "127.0.0.1" in url:
+            self.load_local_files()
+            return
+        
+        # Lu avant de changer l'état : une saisie invalide ne bloque pas le bouton sur "cancel"
+        depth = None
+        if self.crawl_var.get():
+            try:
+                depth = max(0, self.crawl_depth_var.get())
+            except tk.TclError:
+                messagebox.showwarning("warning", "enter a valid folder depth")
+                return
+        
+        self.stop_probing()
+        self.showing_local = False
+        self.current_url = url
+        self.games = []
+        self.search_index = SearchIndex()
+        self.filtered_games = []
+        self.update_game_list()
+        self.status_label.config(text=f"Chargement depuis {url}...")
+        self.load_btn.config(text="cancel", bg="#e74c3c")
+        
+        # Le téléchargement et l'analyse se font dans un thread, l'interface reste fluide
+        self.load_generation += 1
+        self.load_cancel = threading.Event()
+        if depth is not None:
+            target = self.crawl_remote_catalog
+            args = (url, depth, self.load_cancel, self.load_generation)
+        else:
+            target = self.fetch_remote_catalog
+            args = (url, self.load_cancel, self.load_generation)
+        threading.Thread(target=target, args=args, daemon=True).start()
+    
+    def catalog_sources(self):
+        """Sources de "load all" : le dossier local puis chaque URL distincte"""
+        sources = [("local folder", None)]
+        local_url = self.preset_servers["🏠 Serveur Local"]
+        urls = [url for url in self.preset_servers.values() if url and url != local_url]
+        entry_url = self.url_entry.get().strip()
+        if entry_url and entry_url.rstrip('/') != local_url and entry_url not in urls:
+            urls.append(entry_url)
+        sources += [(url, url) for url in urls]
+        return sources
+    
+    def load_all_sources(self):
+        """Charge le dossier local et tous les serveurs en parallèle dans un seul catalogue"""
+        if self.load_cancel is not None:
+            self.cancel_remote_load()
+            return
+        
+        sources = self.catalog_sources()
+        self.stop_probing()
+        self.showing_local = False
+        self.current_url = "all sources"
+        self.games = []
+        self.search_index = SearchIndex()
+        self.filtered_games = []
+        self.update_game_list()
+        self.sources_done = 0
+        self.sources_failed = []
+        self.status_label.config(text=f"loading {len(sources)} source(s)...")
+        self.load_btn.config(text="cancel", bg="#e74c3c")
+        
+        self.load_generation += 1
+        self.load_cancel = threading.Event()
+        generation = self.load_generation
+        cancel = self.load_cancel
+        base_url = f"http://{self.get_local_ip()}:{self.server_port}"
+        
+        def load(url):
+            if url is None:
+                games = scan_local_folder(
+                    self.local_files_dir, base_url, self.references, self.title_metadata
+                )
+                return games, 0
+            games, _ = fetch_catalog(url, self.catalog_cache, cancel)
+            return games, source_priority(url)
+        
+        def worker():
+            # Fusion dans ce thread : l'interface ne reçoit que les différences
+            merger = CatalogMerger()
+            with ThreadPoolExecutor(max_workers=AGGREGATE_WORKERS) as pool:
+                futures = {pool.submit(load, url): label for label, url in sources}
+                for future in as_completed(futures):
+                    if cancel.is_set():
+                        for other in futures:
+                            other.cancel()
+                        return
+                    try:
+                        games, priority = future.result()
+                    except Exception as e:
+                        self.post_ui(self.on_source_failed, generation, futures[future], str(e))
+                    else:
+                        appended, replaced = merger.add(games, priority)
+                        self.post_ui(self.on_source_loaded, generation, futures[future], len(games),
+                                     appended, replaced, merger.duplicates)
+            # Tri et index définitifs, hors du thread Tk
+            self.post_ui(self.on_sources_finished, generation, len(sources),
+                         index_catalog(merger.games), merger.duplicates)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def on_source_loaded(self, generation, label, count, appended, replaced, duplicates):
+        """Ajoute une source terminée au catalogue fusionné
+        
+        self.games suit l'ordre du CatalogMerger du thread de chargement : les
+        nouveaux jeux vont en fin de liste et l'index est complété, pas refait.
+        """
+        if generation != self.load_generation:
+            return
+        self.sources_done += 1
+        for position, game in replaced:
+            self.games[position] = game
+            self.search_index.replace(position, game)
+        self.games.extend(appended)
+        self.search_index.extend(appended)
+        self.apply_search()
+        self.status_label.config(
+            text=f"{label}: {count} game(s) - {len(self.games)} in the catalog,"
+                 f" {duplicates} duplicate(s)"
+        )
+    
+    def on_source_failed(self, generation, label, error):
+        if generation != self.load_generation:
+            return
+        self.sources_done += 1
+        self.sources_failed.append(label)
+        self.status_label.config(text=f"{label}: {error}")
+    
+    def on_sources_finished(self, generation, total, catalog, duplicates):
+        if generation != self.load_generation:
+            return
+        self.load_cancel = None
+        self.load_btn.config(text="load", bg="#27ae60")
+        self.refresh_catalog(catalog)
+        text = (f"{len(self.games)} game(s) from {total - len(self.sources_failed)}/{total}"
+                f" source(s), {duplicates} duplicate(s) merged")
+        if self.sources_failed:
+            text += f" (failed: {', '.join(self.sources_failed)})"
+        self.status_label.config(text=text)
+    
+    def probe_links(self):
+        """Vérifie en arrière-plan la taille et la disponibilité des liens du catalogue"""
+        if self.probe_cancel is not None:
+            self.stop_probing()
+            return
+        if not self.games:
+            messagebox.showwarning("warning", "load a catalog first")
+            return
+        
+        # URL -> jeux (plusieurs entrées peuvent partager un lien)
+        targets = {}
+        for game in self.games:
+            targets.setdefault(game.download_url, []).append(game)
+        
+        self.probe_cancel = threading.Event()
+        self.probe_btn.config(text="stop check", bg="#e74c3c")
+        self.probe_done = 0
+        self.probe_dead = 0
+        cancel = self.probe_cancel
+        
+        def worker():
+            try:
+                self.link_prober.probe_all(
+                    list(targets),
+                    lambda results: self.post_ui(self.on_probe_results, cancel, targets, results),
+                    cancel
+                )
+            finally:
+                self.post_ui(self.on_probe_finished, cancel, len(targets))
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def stop_probing(self):
+        if self.probe_cancel is not None:
+            self.probe_cancel.set()
+            self.probe_cancel = None
+            self.probe_btn.config(text="check links", bg="#3498db")
     
-    def load_local_files(self):
-        """Charge les fichiers du serveur local"""
+    def on_probe_results(self, cancel, targets, results):
+        """Complète les entrées avec les résultats reçus"""
+        if cancel is not self.probe_cancel:
+            return
+        for url, result in results:
+            for game in targets.get(url, ()):
+                game.size = result['size']
+                game.last_modified = result['last_modified']
+                game.available = result['available']
+            self.probe_done += 1
+            if not result['available']:
+                self.probe_dead += 1
+        self.game_listbox.refresh()
+        self.status_label.config(
+            text=f"checking links... {self.probe_done}/{len(targets)} ({self.probe_dead} dead)"
+        )
+    
+    def on_probe_finished(self, cancel, total):
+        if cancel is not self.probe_cancel:
+            return
+        self.stop_probing()
+        self.status_label.config(
+            text=f"{self.probe_done}/{total} link(s) checked, {self.probe_dead} dead"
+        )
+    
+    def cancel_remote_load(self):
+        """Annule le chargement distant en cours"""
+        self.load_cancel.set()
+        self.load_cancel = None
+        self.load_generation += 1
+        self.load_btn.config(text="load", bg="#27ae60")
+        self.status_label.config(text=f"loading cancelled ({len(self.games)} game(s) kept)")
+    
+    def fetch_remote_catalog(self, url, cancel, generation):
+        """Thread de chargement : télécharge l'index (fetch_catalog) et envoie les jeux par lots"""
         try:
-            self.games = []
-            
-            # Lister les fichiers dans le dossier
-            valid_extensions = ['.cia', '.3ds', '.3dsx']
-            
-            for filename in os.listdir(self.local_files_dir):
-                if any(filename.lower().endswith(ext) for ext in valid_extensions):
-                    # Nettoyer le nom
-                    name = filename
-                    for ext in valid_extensions:
-                        if name.lower().endswith(ext):
-                            name = name[:-len(ext)]
-                            break
-                    
-                    name = name.replace('_', ' ').replace('-', ' ')
-                    
-                    # URL de téléchargement
-                    local_ip = self.get_local_ip()
-                    download_url = f"http://{local_ip}:{self.server_port}/{filename}"
-                    
-                    # Extraire région
-                    region = 'Unknown'
-                    if any(x in name.upper() for x in ['(USA)', '[USA]', 'USA']):
-                        region = 'USA'
-                    elif any(x in name.upper() for x in ['(EUR)', '[EUR]', 'EUROPE']):
-                        region = 'EUR'
-                    elif any(x in name.upper() for x in ['(JPN)', '[JPN]', 'JAPAN']):
-                        region = 'JPN'
-                    
-                    file_type = filename.split('.')[-1].upper()
-                    
-                    self.games.append({
-                        'id': str(len(self.games)),
-                        'name': name.strip(),
-                        'region': region,
-                        'download_url': download_url,
-                        'filename': filename,
-                        'type': file_type
-                    })
+            progress = lambda received: self.post_ui(
+                self.on_remote_progress, generation,
+                f"Chargement depuis {url}... {received // 1024} KB"
+            )
+            on_batch = lambda batch, total: self.post_ui(self.on_remote_batch, generation, batch, total)
+            games, reason = fetch_catalog(url, self.catalog_cache, cancel, on_batch, progress)
+            if cancel.is_set():
+                return
+            if reason:
+                # 304 ou serveur injoignable : la liste en cache remplace les lots reçus
+                self.post_cached_catalog(url, games, generation, reason)
+                return
+            self.post_ui(self.on_remote_loaded, generation, url, None, index_catalog(games))
             
-            if len(self.games) == 0:
-                messagebox.showinfo("Aucun fichier", f"Aucun fichier trouvé dans:\n{self.local_files_dir}\n\nUtilisez le bouton '➕ Ajouter fichier(s)' pour ajouter des jeux.")
-            else:
-                self.games.sort(key=lambda x: x['name'])
-                self.filtered_games = self.games
-                self.update_game_list()
-                self.status_label.config(text=f"✅ {len(self.games)} fichier(s) local(aux) chargé(s)")
-                
+        except requests.exceptions.RequestException as e:
+            # Erreur HTTP, flux coupé, ou serveur injoignable sans cache
+            self.post_ui(self.on_remote_error, generation, "Error network",
+                         f"Impossible to charge:\n{str(e)}", "error of network")
         except Exception as e:
-            messagebox.showerror("Error", f"Error in the loading :\n{str(e)}")
-    
-    def open_local_folder(self):
-        """Ouvre le dossier local dans l'explorateur"""
-        if os.name == 'nt':  # Windows
-            os.startfile(self.local_files_dir)
-        elif os.name == 'posix':  # macOS et Linux
-            import subprocess
-            subprocess.call(['open' if sys.platform == 'darwin' else 'xdg-open', self.local_files_dir])
+            self.post_ui(self.on_remote_error, generation, "Error",
+                         f"Error in the loading:\n{str(e)}", "error in the loading")
     
-    def load_from_server(self):
-        """Charge la liste depuis le serveur configuré"""
-        url = self.url_entry.get().strip()
+    def crawl_remote_catalog(self, url, depth, cancel, generation):
+        """Thread de chargement avec sous-dossiers : les jeux arrivent page par page"""
+        crawler = IndexCrawler(max_depth=depth)
+        games = []
+        lock = threading.Lock()
         
-        if not url:
-            messagebox.showwarning("warning", "enter a valid URL")
-            return
+        def on_games(batch):
+            with lock:
+                games.extend(batch)
+                total = len(games)
+            self.post_ui(self.on_remote_batch, generation, batch, total)
         
-        # Si c'est le serveur local, charger directement
-        if "localhost" in url or "127.0.0.1" in url:
-            self.load_local_files()
+        def progress(pages, queued):
+            self.post_ui(self.on_remote_progress, generation,
+                         f"Chargement depuis {url}... {pages} page(s), {queued} queued,"
+                         f" {len(games)} game(s)")
+        
+        try:
+            crawler.crawl(url, on_games, cancel, progress)
+        except OFFLINE_ERRORS as e:
+            cached = self.catalog_cache.load(url)
+            if cached:
+                self.post_cached_catalog(url, cached[2], generation, "offline")
+                return
+            self.post_ui(self.on_remote_error, generation, "Error network",
+                         f"Impossible to charge:\n{str(e)}", "error of network")
+            return
+        except requests.exceptions.RequestException as e:
+            self.post_ui(self.on_remote_error, generation, "Error network",
+                         f"Impossible to charge:\n{str(e)}", "error of network")
             return
+        except Exception as e:
+            self.post_ui(self.on_remote_error, generation, "Error",
+                         f"Error in the loading:\n{str(e)}", "error in the loading")
+            return
+        if cancel.is_set():
+            return
+        
+        # Pas de validateur commun à toutes les pages : on garde la liste pour le mode hors ligne
+        self.catalog_cache.store(url, None, None, games)
+        self.post_ui(self.on_remote_loaded, generation, url, None, index_catalog(games))
+    
+    def post_cached_catalog(self, url, games, generation, reason):
+        """Envoie un catalogue du cache, qui remplace les lots déjà reçus"""
+        self.post_ui(self.on_remote_loaded, generation, url, reason, index_catalog(games))
+    
+    def restore_last_catalog(self):
+        """Affiche au démarrage le dernier catalogue distant enregistré"""
+        generation = self.load_generation
         
+        def worker():
+            try:
+                last = self.catalog_cache.last()
+            except sqlite3.Error:
+                return
+            if last:
+                url, games = last
+                self.post_ui(self.on_catalog_restored, generation, url, index_catalog(games))
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def on_catalog_restored(self, generation, url, catalog):
+        # Un chargement lancé entre-temps a la priorité
+        if generation != self.load_generation:
+            return
+        self.showing_local = False
         self.current_url = url
-        self.status_label.config(text=f"Chargement depuis {url}...")
-        self.root.update()
+        self.url_entry.delete(0, tk.END)
+        self.url_entry.insert(0, url)
+        self.refresh_catalog(catalog)
+        self.status_label.config(text=f" {len(self.games)} game(s) restored from cache ({url})")
+    
+    def on_remote_progress(self, generation, text):
+        if generation == self.load_generation:
+            self.status_label.config(text=text)
+    
+    def on_remote_batch(self, generation, batch, total):
+        """Ajoute un lot de jeux à la liste pendant le chargement"""
+        if generation != self.load_generation:
+            return
+        self.games.extend(batch)
+        self.search_index.extend(batch)
+        if not self.search_var.get():
+            # Même liste que self.games : seule la fenêtre visible est redessinée
+            if self.filtered_games is not self.games:
+                self.filtered_games = self.games
+                self.update_game_list()
+            else:
+                self.game_listbox.refresh()
+        self.status_label.config(text=f"Chargement depuis {self.current_url}... {total} game(s)")
+    
+    def on_remote_loaded(self, generation, url, cache_reason, catalog):
+        """Fin du chargement distant : le catalogue trié et indexé remplace la liste"""
+        if generation != self.load_generation:
+            return
+        self.load_cancel = None
+        self.load_btn.config(text="load", bg="#27ae60")
+        self.refresh_catalog(catalog)
         
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            self.games = []
-            links = soup.find_all('a', href=True)
-            
-            valid_extensions = ['.cia', '.3ds', '.3dsx']
-            
-            for link in links:
-                href = link.get('href', '')
-                
-                if any(href.lower().endswith(ext) for ext in valid_extensions):
-                    name = os.path.basename(href)
-                    original_name = name
-                    
-                    for ext in valid_extensions:
-                        if name.lower().endswith(ext):
-                            name = name[:-len(ext)]
-                            break
-                    
-                    name = name.replace('_', ' ').replace('-', ' ')
-                    
-                    if href.startswith('http'):
-                        download_url = href
-                    else:
-                        download_url = f"{url.rstrip('/')}/{href.lstrip('/')}"
-                    
-                    region = 'Unknown'
-                    if any(x in name.upper() for x in ['(USA)', '[USA]', 'USA']):
-                        region = 'USA'
-                    elif any(x in name.upper() for x in ['(EUR)', '[EUR]', 'EUROPE', 'EUR']):
-                        region = 'EUR'
-                    elif any(x in name.upper() for x in ['(JPN)', '[JPN]', 'JAPAN', 'JPN']):
-                        region = 'JPN'
-                    
-                    file_type = original_name.split('.')[-1].upper()
-                    
-                    self.games.append({
-                        'id': str(len(self.games)),
-                        'name': name.strip(),
-                        'region': region,
-                        'download_url': download_url,
-                        'filename': original_name,
-                        'type': file_type
-                    })
-            
-            if len(self.games) == 0:
-                messagebox.showwarning("warning", f"none file was find in :\n{url}")
-                self.status_label.config(text="no file found")
+        if cache_reason and self.games:
+            if cache_reason == "unchanged":
+                text = f" {len(self.games)} game(s) (catalog unchanged, restored from cache)"
             else:
-                self.games.sort(key=lambda x: x['name'])
-                self.filtered_games = self.games[:100]
-                self.update_game_list()
-                self.status_label.config(text=f" {len(self.games)} game charge from server")
-                messagebox.showinfo("Succes", f"{len(self.games)} game was charge in the server !")
-                
-        except requests.exceptions.RequestException as e:
-            messagebox.showerror("Error network", f"Impossible to charge:\n{str(e)}")
-            self.status_label.config(text="error of network")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error in the loading:\n{str(e)}")
-            self.status_label.config(text="error in the loading")
+                text = f" {len(self.games)} game(s) from cache (server unreachable)"
+            self.status_label.config(text=text)
+        elif len(self.games) == 0:
+            messagebox.showwarning("warning", f"none file was find in :\n{url}")
+            self.status_label.config(text="no file found")
+        else:
+            self.status_label.config(text=f" {len(self.games)} game charge from server")
+            messagebox.showinfo("Succes", f"{len(self.games)} game was charge in the server !")
+    
+    def on_remote_error(self, generation, title, message, status):
+        if generation != self.load_generation:
+            return
+        self.load_cancel = None
+        self.load_btn.config(text="load", bg="#27ae60")
+        messagebox.showerror(title, message)
+        self.status_label.config(text=status)
+    
+    def post_ui(self, callback, *args):
+        """Envoie un appel au thread Tk (utilisable depuis n'importe quel thread)"""
+        self.ui_queue.put((callback, args))
+    
+    def process_ui_queue(self):
+        """Exécute les appels envoyés par les threads de travail
+        
+        Un appel qui échoue est signalé comme une erreur de callback Tk, sans
+        empêcher les suivants ni la prochaine relève de la file.
+        """
+        try:
+            while True:
+                try:
+                    callback, args = self.ui_queue.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    callback(*args)
+                except Exception:
+                    self.root.report_callback_exception(*sys.exc_info())
+        finally:
+            self.root.after(UI_POLL_MS, self.process_ui_queue)
     
     def on_server_select(self, event):
         """Gère la sélection d'un serveur prédéfini"""
         selected = self.server_combo.get()
         
-        if selected == "Personnalise":
+        if selected == "personalize":
             self.url_entry.config(state="normal")
             self.url_entry.delete(0, tk.END)
             self.url_entry.focus()
-        elif selected == "local server":
+        elif selected == "🏠 Serveur Local":
             local_ip = self.get_local_ip()
             url = f"http://{local_ip}:{self.server_port}"
             self.url_entry.config(state="normal")
@@ -414,6 +3636,124 @@ class QRCodeGenerator:
             pady=8
         ).pack(side="left", padx=5)
         
+        # Options du serveur local
+        local_opts_frame = tk.Frame(local_server_frame, bg="#16213e")
+        local_opts_frame.pack(padx=10)
+        
+        tk.Label(
+            local_opts_frame,
+            text="interface:",
+            font=("Arial", 10),
+            bg="#16213e",
+            fg="white"
+        ).pack(side="left", padx=(0, 2))
+        
+        self.interface_combo = ttk.Combobox(
+            local_opts_frame,
+            values=self.network.choices(),
+            textvariable=self.interface_var,
+            postcommand=self.refresh_interface_choices,
+            state="readonly",
+            font=("Arial", 10),
+            width=15
+        )
+        self.interface_combo.pack(side="left", padx=2)
+        self.interface_combo.bind('<<ComboboxSelected>>', self.on_interface_select)
+        
+        tk.Label(
+            local_opts_frame,
+            text="workers:",
+            font=("Arial", 10),
+            bg="#16213e",
+            fg="white"
+        ).pack(side="left", padx=(10, 2))
+        
+        tk.Spinbox(
+            local_opts_frame,
+            from_=1,
+            to=64,
+            textvariable=self.max_workers_var,
+            font=("Arial", 10),
+            width=4
+        ).pack(side="left", padx=2)
+        
+        tk.Label(
+            local_opts_frame,
+            text="add mode:",
+            font=("Arial", 10),
+            bg="#16213e",
+            fg="white"
+        ).pack(side="left", padx=(10, 2))
+        
+        ttk.Combobox(
+            local_opts_frame,
+            values=["reference", "copy"],
+            textvariable=self.add_mode_var,
+            state="readonly",
+            font=("Arial", 10),
+            width=9
+        ).pack(side="left", padx=2)
+        
+        tk.Checkbutton(
+            local_opts_frame,
+            text="short links",
+            variable=self.short_links_var,
+            command=self.on_qr_options_change,
+            font=("Arial", 10),
+            bg="#16213e",
+            fg="white",
+            selectcolor="#0f3460",
+            activebackground="#16213e"
+        ).pack(side="left", padx=(10, 2))
+        
+        tk.Checkbutton(
+            local_opts_frame,
+            text="LAN cache (GB):",
+            variable=self.proxy_var,
+            command=self.on_qr_options_change,
+            font=("Arial", 10),
+            bg="#16213e",
+            fg="white",
+            selectcolor="#0f3460",
+            activebackground="#16213e"
+        ).pack(side="left", padx=(10, 2))
+        
+        tk.Spinbox(
+            local_opts_frame,
+            from_=1,
+            to=2000,
+            textvariable=self.proxy_cache_gb_var,
+            font=("Arial", 10),
+            width=5
+        ).pack(side="left", padx=2)
+        
+        # Limites de débit et de connexions (0 = illimité), modifiables serveur lancé
+        limits_frame = tk.Frame(local_server_frame, bg="#16213e")
+        limits_frame.pack(padx=10, pady=(4, 0))
+        
+        for text, variable, to in (
+            ("max MB/s:", self.global_rate_var, 1000),
+            ("per console MB/s:", self.client_rate_var, 1000),
+            ("connections per console:", self.max_connections_var, 64),
+        ):
+            tk.Label(
+                limits_frame,
+                text=text,
+                font=("Arial", 10),
+                bg="#16213e",
+                fg="white"
+            ).pack(side="left", padx=(10, 2))
+            
+            tk.Spinbox(
+                limits_frame,
+                from_=0,
+                to=to,
+                textvariable=variable,
+                font=("Arial", 10),
+                width=5
+            ).pack(side="left", padx=2)
+            variable.trace_add("write", self.apply_transfer_limits)
+        
         # Statut serveur
         self.server_status_label = tk.Label(
             local_server_frame,
@@ -424,6 +3764,23 @@ class QRCodeGenerator:
         )
         self.server_status_label.pack(pady=5)
         
+        # Progression des copies en arrière-plan (affichée pendant une copie)
+        self.copy_frame = tk.Frame(local_server_frame, bg="#16213e")
+        
+        self.copy_progress = ttk.Progressbar(self.copy_frame, mode="determinate")
+        self.copy_progress.pack(side="left", fill="x", expand=True)
+        
+        self.copy_cancel_btn = tk.Button(
+            self.copy_frame,
+            text="cancel copy",
+            command=self.cancel_copy,
+            bg="#e74c3c",
+            fg="white",
+            font=("Arial", 9, "bold"),
+            padx=8
+        )
+        self.copy_cancel_btn.pack(side="left", padx=(5, 0))
+        
         # Frame serveur distant
         server_frame = tk.LabelFrame(
             self.root,
@@ -455,10 +3812,30 @@ class QRCodeGenerator:
             font=("Arial", 10),
             width=35
         )
-        self.server_combo.set("local server")
+        self.server_combo.set("🏠 Serveur Local")
         self.server_combo.pack(side="left", padx=5)
         self.server_combo.bind('<<ComboboxSelected>>', self.on_server_select)
         
+        tk.Checkbutton(
+            preset_frame,
+            text="subfolders, depth:",
+            variable=self.crawl_var,
+            font=("Arial", 10),
+            bg="#16213e",
+            fg="white",
+            selectcolor="#0f3460",
+            activebackground="#16213e"
+        ).pack(side="left", padx=(10, 2))
+        
+        tk.Spinbox(
+            preset_frame,
+            from_=1,
+            to=10,
+            textvariable=self.crawl_depth_var,
+            font=("Arial", 10),
+            width=3
+        ).pack(side="left", padx=2)
+        
         # Barre URL
         url_frame = tk.Frame(server_frame, bg="#16213e")
         url_frame.pack(pady=8, padx=10, fill="x")
@@ -484,7 +3861,7 @@ class QRCodeGenerator:
         self.url_entry.insert(0, f"http://{local_ip}:{self.server_port}")
         self.url_entry.pack(side="left", padx=5, fill="x", expand=True)
         
-        tk.Button(
+        self.load_btn = tk.Button(
             url_frame,
             text="load",
             command=self.load_from_server,
@@ -493,7 +3870,32 @@ class QRCodeGenerator:
             font=("Arial", 10, "bold"),
             padx=15,
             pady=5
-        ).pack(side="left", padx=5)
+        )
+        self.load_btn.pack(side="left", padx=5)
+        
+        self.load_all_btn = tk.Button(
+            url_frame,
+            text="load all",
+            command=self.load_all_sources,
+            bg="#16a085",
+            fg="white",
+            font=("Arial", 10, "bold"),
+            padx=15,
+            pady=5
+        )
+        self.load_all_btn.pack(side="left", padx=5)
+        
+        self.probe_btn = tk.Button(
+            url_frame,
+            text="check links",
+            command=self.probe_links,
+            bg="#3498db",
+            fg="white",
+            font=("Arial", 10, "bold"),
+            padx=15,
+            pady=5
+        )
+        self.probe_btn.pack(side="left", padx=5)
         
         # Recherche
         search_frame = tk.Frame(self.root, bg="#1a1a2e")
@@ -536,24 +3938,21 @@ class QRCodeGenerator:
             fg="white"
         ).pack(pady=5)
         
-        scrollbar = tk.Scrollbar(list_frame)
-        scrollbar.pack(side="right", fill="y")
-        
-        self.game_listbox = tk.Listbox(
+        # Liste virtualisée : tout le catalogue est accessible sans limite
+        self.game_listbox = VirtualListbox(
             list_frame,
+            formatter=self.format_game,
+            selectmode="extended",
             font=("Arial", 9),
             bg="#0f3460",
             fg="white",
             selectbackground="#6c5ce7",
             selectforeground="white",
-            yscrollcommand=scrollbar.set,
             relief="flat"
         )
         self.game_listbox.pack(fill="both", expand=True, padx=5, pady=5)
         self.game_listbox.bind('<<ListboxSelect>>', self.on_game_select)
         
-        scrollbar.config(command=self.game_listbox.yview)
-        
         # QR Code
         qr_frame = tk.Frame(main_frame, bg="#16213e", relief="ridge", bd=2)
         qr_frame.pack(side="right", fill="both", expand=True)
@@ -579,6 +3978,59 @@ class QRCodeGenerator:
         )
         self.info_label.pack(pady=5)
         
+        # Options QR : lot d'URLs, version max et correction d'erreur
+        qr_options = tk.Frame(qr_frame, bg="#16213e")
+        qr_options.pack(pady=3)
+        
+        tk.Checkbutton(
+            qr_options,
+            text="bundle (Ctrl/Shift+click)",
+            variable=self.bundle_var,
+            command=self.on_qr_options_change,
+            font=("Arial", 9),
+            bg="#16213e",
+            fg="white",
+            selectcolor="#0f3460",
+            activebackground="#16213e"
+        ).pack(side="left", padx=3)
+        
+        tk.Label(
+            qr_options,
+            text="max version:",
+            font=("Arial", 9),
+            bg="#16213e",
+            fg="white"
+        ).pack(side="left", padx=(8, 2))
+        
+        tk.Spinbox(
+            qr_options,
+            from_=1,
+            to=40,
+            textvariable=self.max_version_var,
+            command=self.on_qr_options_change,
+            font=("Arial", 9),
+            width=3
+        ).pack(side="left", padx=2)
+        
+        tk.Label(
+            qr_options,
+            text="EC:",
+            font=("Arial", 9),
+            bg="#16213e",
+            fg="white"
+        ).pack(side="left", padx=(8, 2))
+        
+        ec_combo = ttk.Combobox(
+            qr_options,
+            values=list(QR_ERROR_LEVELS),
+            textvariable=self.ec_var,
+            state="readonly",
+            font=("Arial", 9),
+            width=3
+        )
+        ec_combo.pack(side="left", padx=2)
+        ec_combo.bind('<<ComboboxSelected>>', self.on_qr_options_change)
+        
         self.qr_canvas = tk.Canvas(
             qr_frame,
             width=320,
@@ -588,6 +4040,38 @@ class QRCodeGenerator:
         )
         self.qr_canvas.pack(pady=8)
         
+        # Navigation entre les QR d'un lot
+        bundle_nav = tk.Frame(qr_frame, bg="#16213e")
+        bundle_nav.pack()
+        
+        self.prev_bundle_btn = tk.Button(
+            bundle_nav,
+            text="<",
+            command=lambda: self.show_bundle_page(self.bundle_page - 1),
+            font=("Arial", 9, "bold"),
+            state="disabled"
+        )
+        self.prev_bundle_btn.pack(side="left", padx=3)
+        
+        self.bundle_label = tk.Label(
+            bundle_nav,
+            text="",
+            font=("Arial", 9),
+            bg="#16213e",
+            fg="#a8dadc",
+            width=12
+        )
+        self.bundle_label.pack(side="left", padx=3)
+        
+        self.next_bundle_btn = tk.Button(
+            bundle_nav,
+            text=">",
+            command=lambda: self.show_bundle_page(self.bundle_page + 1),
+            font=("Arial", 9, "bold"),
+            state="disabled"
+        )
+        self.next_bundle_btn.pack(side="left", padx=3)
+        
         btn_container = tk.Frame(qr_frame, bg="#16213e")
         btn_container.pack(pady=8)
         
@@ -617,6 +4101,17 @@ class QRCodeGenerator:
         )
         self.browser_btn.pack(pady=3)
         
+        tk.Button(
+            btn_container,
+            text="print sheet",
+            command=self.save_contact_sheet,
+            bg="#16a085",
+            fg="white",
+            font=("Arial", 10, "bold"),
+            padx=15,
+            pady=8
+        ).pack(pady=3)
+        
         tk.Label(
             qr_frame,
             text="Scanne into your 3ds",
@@ -637,48 +4132,245 @@ class QRCodeGenerator:
         self.status_label.pack(side="bottom", fill="x", padx=5, pady=5)
     
     def update_game_list(self):
-        self.game_listbox.delete(0, tk.END)
-        for game in self.filtered_games:
-            display = f"{game['name']}"
-            if game['region'] != 'Unknown':
-                display += f" [{game['region']}]"
-            display += f" ({game['type']})"
-            self.game_listbox.insert(tk.END, display)
+        self.game_listbox.set_items(self.filtered_games)
+    
+    def format_game(self, game):
+        display = game.name
+        if game.region != 'Unknown':
+            display += f" [{game.region}]"
+        display += f" ({game.type})"
+        if game.available is False:
+            display = "✗ " + display
+        elif game.size is not None:
+            display += f" - {format_size(game.size)}"
+        return display
+    
+    def read_folder_changes(self, added, removed, renamed):
+        """Thread de surveillance : lit les en-têtes des nouveaux fichiers (un seul
+        lookup_many, une transaction SQLite) puis envoie les entrées prêtes"""
+        removed = set(removed)
+        removed.update(old for old, _ in renamed)
+        added = list(added) + [new for _, new in renamed]
+        
+        paths = {filename: os.path.join(self.local_files_dir, filename) for filename in added}
+        try:
+            infos = self.title_metadata.lookup_many(list(paths.values()))
+        except sqlite3.Error:
+            # Base occupée : les jeux sont ajoutés d'après leur nom de fichier
+            infos = {}
+        base_url = f"http://{self.get_local_ip()}:{self.server_port}"
+        new_games = []
+        for filename, path in paths.items():
+            game = build_local_game(filename, base_url, infos.get(path))
+            if game:
+                new_games.append(game)
+        self.post_ui(self.on_folder_changes, new_games, removed)
+    
+    def on_folder_changes(self, new_games, removed):
+        """Applique au catalogue local les changements du dossier, sans tout relire"""
+        if not self.showing_local:
+            return
+        
+        chosen, current = self.game_listbox.selected_items()
+        
+        if removed:
+            gone = [game for game in self.games if game.filename in removed]
+            self.games[:] = [game for game in self.games if game.filename not in removed]
+            self.search_index.discard(gone)
+        
+        for game in new_games:
+            bisect.insort(self.games, game, key=lambda x: x.name)
+        
+        # L'index est complété sur place (recherche exacte tout de suite) ; un index
+        # trié est refait en arrière-plan pour remettre les ajouts à leur rang
+        self.search_index.extend(new_games)
+        self.reindex_in_background()
+        
+        # Recherche vide : la liste affichée est self.games, on redessine juste la fenêtre
+        if not self.search_var.get() and self.filtered_games is self.games:
+            self.game_listbox.refresh()
+        else:
+            self.apply_search()
+        # Les lignes ont bougé : la sélection suit les jeux, pas les indices
+        self.game_listbox.reselect(chosen, current)
+        if self.selected_game is not None and self.selected_game.filename in removed:
+            self.selected_game = None
+            self.save_btn.config(state="disabled")
+            self.browser_btn.config(state="disabled")
+        self.status_label.config(
+            text=f"local folder: +{len(new_games)} -{len(removed)} ({len(self.games)} file(s))"
+        )
+    
+    def reindex_in_background(self):
+        """Reconstruit l'index du catalogue dans un thread, sans bloquer la recherche"""
+        self.folder_changes += 1
+        index, changes = self.search_index, self.folder_changes
+        games = list(self.games)
+        
+        def worker():
+            rebuilt = SearchIndex(games)
+            self.post_ui(self.on_reindexed, index, changes, rebuilt)
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def on_reindexed(self, index, changes, rebuilt):
+        # Ignoré si le catalogue a été rechargé ou modifié depuis
+        if self.search_index is index and self.folder_changes == changes:
+            self.search_index = rebuilt
+    
+    def refresh_catalog(self, catalog=None):
+        """Affiche un catalogue déjà trié et indexé (index_catalog), sinon trie et
+        reconstruit l'index ici, puis réapplique la recherche"""
+        if catalog is None:
+            catalog = index_catalog(self.games)
+        self.games, self.search_index = catalog
+        self.apply_search()
     
     def on_search(self, *args):
-        search_term = self.search_var.get().lower()
-        if not search_term:
-            self.filtered_games = self.games[:100]
+        """Attend la fin de la frappe avant de lancer la recherche"""
+        if self._search_timer:
+            self.root.after_cancel(self._search_timer)
+        self._search_timer = self.root.after(SEARCH_DEBOUNCE_MS, self.apply_search)
+    
+    def apply_search(self):
+        self._search_timer = None
+        query = self.search_var.get()
+        if not query:
+            # Pas de filtre : la liste affichée est le catalogue lui-même
+            results = self.games
         else:
-            self.filtered_games = [
-                game for game in self.games
-                if search_term in game['name'].lower() or
-                   search_term in game['region'].lower() or
-                   search_term in game['type'].lower()
-            ][:100]
+            results = self.search_index.search(query)
+        self.filtered_games = results
         self.update_game_list()
-        self.status_label.config(text=f"search {len(self.filtered_games)} fichier(s)")
+        self.status_label.config(text=f"search {len(results)} fichier(s)")
     
     def on_game_select(self, event):
         selection = self.game_listbox.curselection()
         if not selection:
             return
         
-        index = selection[0]
-        self.selected_game = self.filtered_games[index]
+        games = [self.filtered_games[index] for index in selection]
+        self.selected_game = games[0]
+        
+        if len(games) > 1 and self.bundle_var.get():
+            self.show_bundle(games)
+        else:
+            self.bundle_pages = []
+            self.update_bundle_nav()
+            
+            game = self.selected_game
+            self.qr_title.config(text=game.name)
+            
+            info_text = ""
+            if game.title:
+                info_text += f"Titre: {game.title}\n"
+            info_text += f"Type: {game.type}\n"
+            info_text += f"Région: {game.region}\n"
+            info_text += f"Fichier: {game.filename}\n"
+            if game.title_id:
+                info_text += f"Title ID: {game.title_id}"
+                if game.product_code:
+                    info_text += f" ({game.product_code})"
+                if game.version is not None:
+                    info_text += f" v{game.version}"
+                info_text += "\n"
+            if game.available is not None:
+                info_text += f"Taille: {format_size(game.size)}"
+                info_text += " (online)" if game.available else " (dead link)"
+                info_text += "\n"
+            info_text += "\n"
+            info_text += f"URL: {game.download_url}"
+            
+            self.info_label.config(text=info_text)
+            self.generate_qr_code()
+        
+        self.save_btn.config(state="normal")
+        self.browser_btn.config(state="normal")
+    
+    def show_bundle(self, games):
+        """Répartit les URLs sélectionnées dans le moins de QR codes possible"""
+        try:
+            max_version = max(1, min(40, int(self.max_version_var.get())))
+        except (tk.TclError, ValueError):
+            max_version = QR_BUNDLE_MAX_VERSION
         
-        self.qr_title.config(text=self.selected_game['name'])
+        urls = self.qr_urls(games, self.qr_link_base())
+        self.bundle_pages = pack_urls_into_qr(urls, max_version, self.qr_error_level())
+        self.bundle_names = {url: game.name for url, game in zip(urls, games)}
         
-        info_text = f"Type: {self.selected_game['type']}\n"
-        info_text += f"Région: {self.selected_game['region']}\n"
-        info_text += f"Fichier: {self.selected_game['filename']}\n\n"
-        info_text += f"URL: {self.selected_game['download_url']}"
+        self.qr_title.config(
+            text=f"{len(games)} games in {len(self.bundle_pages)} QR code(s)"
+        )
+        self.show_bundle_page(0)
+    
+    def show_bundle_page(self, page):
+        if not self.bundle_pages:
+            return
+        self.bundle_page = max(0, min(len(self.bundle_pages) - 1, page))
+        urls = self.bundle_pages[self.bundle_page]
         
+        names = [self.bundle_names.get(url, url) for url in urls]
+        info_text = f"{len(urls)} install(s) in this QR:\n"
+        info_text += "\n".join(names[:8])
+        if len(names) > 8:
+            info_text += f"\n... +{len(names) - 8}"
         self.info_label.config(text=info_text)
+        
+        self.update_bundle_nav()
         self.generate_qr_code()
+    
+    def update_bundle_nav(self):
+        pages = len(self.bundle_pages)
+        if pages:
+            self.bundle_label.config(text=f"QR {self.bundle_page + 1}/{pages}")
+        else:
+            self.bundle_label.config(text="")
+        self.prev_bundle_btn.config(state="normal" if self.bundle_page > 0 and pages else "disabled")
+        self.next_bundle_btn.config(state="normal" if self.bundle_page < pages - 1 else "disabled")
+    
+    def on_qr_options_change(self, *args):
+        """Recalcule le QR affiché après un changement d'option"""
+        if self.game_listbox.curselection():
+            self.on_game_select(None)
+    
+    def qr_error_level(self):
+        return QR_ERROR_LEVELS.get(self.ec_var.get(), qrcode.constants.ERROR_CORRECT_L)
+    
+    def current_qr_data(self):
+        """Texte encodé dans le QR affiché : une URL, ou un lot d'URLs (une par ligne)"""
+        if self.bundle_pages:
+            return "\n".join(self.bundle_pages[self.bundle_page])
+        return self.qr_url(self.selected_game)
+    
+    def qr_url(self, game):
+        """URL mise dans le QR : courte (/g/<id> sur le serveur local) si l'option est active
         
-        self.save_btn.config(state="normal")
-        self.browser_btn.config(state="normal")
+        Les longues URLs distantes donnent des QR de version élevée, difficiles à
+        scanner ; l'adresse courte garde un QR petit et le serveur redirige (ou
+        sert le fichier depuis son cache LAN).
+        """
+        base = self.qr_link_base()
+        if base is None:
+            return game.download_url
+        return base + self.short_links.shorten(game.download_url)
+    
+    def qr_link_base(self):
+        """Préfixe des liens courts (liens courts ou cache LAN actifs), sinon None
+        
+        Lit les options Tk : à appeler dans le thread Tk.
+        """
+        if not (self.short_links_var.get() or self.proxy_var.get()):
+            return None
+        return f"http://{self.get_local_ip()}:{self.server_port}/g/"
+    
+    def qr_urls(self, games, base):
+        """qr_url() pour plusieurs jeux, avec une seule transaction SQLite
+        
+        base vient de qr_link_base() ; utilisable depuis un thread de travail.
+        """
+        if base is None:
+            return [game.download_url for game in games]
+        short_ids = self.short_links.shorten_many([game.download_url for game in games])
+        return [base + short_id for short_id in short_ids]
     
     def generate_qr_code(self):
         if not self.selected_game:
@@ -694,22 +4386,29 @@ class QRCodeGenerator:
         if canvas_height <= 1:
             canvas_height = 400
         
+        # Rien à refaire si le QR affiché correspond déjà à ce contenu et cette taille
+        data = self.current_qr_data()
+        error_level = self.qr_error_level()
+        key = (data, error_level, canvas_width, canvas_height)
+        if key == self._qr_key:
+            return
+        
         # Calculer la taille du QR code (90% de la taille du canvas)
         qr_size = int(min(canvas_width, canvas_height) * 0.9)
         
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(self.selected_game['download_url'])
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        img = img.resize((qr_size, qr_size), Image.Resampling.LANCZOS)
+        cache_key = (data, error_level, qr_size)
+        photo = self.qr_photo_cache.get(cache_key)
+        if photo is None:
+            img = render_qr_image(encode_qr_matrix(data, error_level), qr_size)
+            photo = ImageTk.PhotoImage(img)
+            self.qr_photo_cache[cache_key] = photo
+            if len(self.qr_photo_cache) > QR_PHOTO_CACHE_SIZE:
+                self.qr_photo_cache.popitem(last=False)
+        else:
+            self.qr_photo_cache.move_to_end(cache_key)
         
-        self.qr_image = ImageTk.PhotoImage(img)
+        self.qr_image = photo
+        self._qr_key = key
         self.qr_canvas.delete("all")
         self.qr_canvas.create_image(canvas_width//2, canvas_height//2, image=self.qr_image)
     
@@ -717,8 +4416,10 @@ class QRCodeGenerator:
         if not self.selected_game:
             return
         
-        safe_name = "".join(c for c in self.selected_game['name'] if c.isalnum() or c in (' ', '-', '_'))
-        default_name = f"{safe_name}_QR.png"
+        if self.bundle_pages:
+            default_name = f"bundle_{self.bundle_page + 1}_QR.png"
+        else:
+            default_name = qr_file_name(self.selected_game)
         
         filename = filedialog.asksaveasfilename(
             defaultextension=".png",
@@ -727,31 +4428,70 @@ class QRCodeGenerator:
         )
         
         if filename:
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(self.selected_game['download_url'])
-            qr.make(fit=True)
-            
-            img = qr.make_image(fill_color="black", back_color="white")
-            img.save(filename)
+            # Même matrice que l'affichage (cache), 10 pixels par module
+            matrix = encode_qr_matrix(self.current_qr_data(), self.qr_error_level())
+            img = render_qr_image(matrix, len(matrix) * 10)
+            img.convert("1").save(filename)
             
             messagebox.showinfo("Succes", f"QR code save:\n{filename}")
     
+    def save_contact_sheet(self):
+        """Exporte les jeux affichés sur des planches imprimables"""
+        games = list(self.filtered_games)
+        if not games:
+            messagebox.showwarning("warning", "load or search some games first")
+            return
+        # Même choix d'URL que le QR affiché (liens courts ou cache LAN)
+        base = self.qr_link_base()
+        
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            initialfile="3ds_qr_sheet.pdf",
+            filetypes=[("PDF files", "*.pdf"), ("PNG files (one per page)", "*.png")]
+        )
+        if not filename:
+            return
+        
+        # Le rendu page par page se fait en arrière-plan
+        def worker():
+            nonlocal games
+            try:
+                if base is not None:
+                    urls = self.qr_urls(games, base)
+                    games = [game.with_url(url) for game, url in zip(games, urls)]
+                progress = lambda page, pages: self.post_ui(self.on_sheet_progress, page, pages)
+                files = export_contact_sheets(games, filename, progress)
+                self.post_ui(messagebox.showinfo, "Succes",
+                             f"{len(games)} QR code(s) on {len(files)} file(s):\n{filename}")
+            except Exception as e:
+                self.post_ui(messagebox.showerror, "Error", f"Error in the sheet:\n{str(e)}")
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def on_sheet_progress(self, page, pages):
+        self.status_label.config(text=f"sheet page {page}/{pages}...")
+    
     def open_in_browser(self):
         if self.selected_game:
-            webbrowser.open(self.selected_game['download_url'])
+            webbrowser.open(self.selected_game.download_url)
     
     def on_closing(self):
         """Gère la fermeture de l'application"""
+        if self.load_cancel is not None:
+            self.load_cancel.set()
+        if self.copy_cancel is not None:
+            self.copy_cancel.set()
+        self.folder_watcher.stop()
+        self.stop_probing()
         if self.server_running:
             self.stop_local_server()
         self.root.destroy()
 
 if __name__ == "__main__":
+    # Avec des arguments : export en ligne de commande, sans fenêtre
+    if len(sys.argv) > 1:
+        sys.exit(main_cli(sys.argv[1:]))
+    
     root = tk.Tk()
     app = QRCodeGenerator(root)
     root.mainloop()
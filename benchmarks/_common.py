@@ -0,0 +1,29 @@
+"""Outils communs aux benchmarks (chargement de l'application, serveur local)"""
+import importlib.util
+import os
+import sys
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app():
+    """Importe 3ds_qr_generator.py (nom de fichier non importable directement)"""
+    module = sys.modules.get("qr_generator")
+    if module is None:
+        spec = importlib.util.spec_from_file_location(
+            "qr_generator", os.path.join(ROOT, "3ds_qr_generator.py")
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["qr_generator"] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+def start_server(app, directory, handler_class=None, **kwargs):
+    """Démarre un LocalHTTPServer sur un port libre ; retourne (serveur, port)"""
+    handler_class = handler_class or app.LocalServerHandler
+    handler = lambda *args, **kw: handler_class(*args, directory=directory, **kw)
+    server = app.LocalHTTPServer(("127.0.0.1", 0), handler, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
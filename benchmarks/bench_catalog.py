@@ -0,0 +1,95 @@
+"""Mémoire et débit de construction du catalogue : CatalogEntry (__slots__)
+contre le dictionnaire à six clés d'avant
+
+    python benchmarks/bench_catalog.py [--entries 100000]
+"""
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+from _common import load_app
+
+app = load_app()
+
+
+def build_remote_game_dict(href, url):
+    """Ancien constructeur : dictionnaire, nettoyage et région en plusieurs passes"""
+    valid_extensions = ['.cia', '.3ds', '.3dsx']
+    if not any(href.lower().endswith(ext) for ext in valid_extensions):
+        return None
+    
+    name = os.path.basename(href)
+    original_name = name
+    for ext in valid_extensions:
+        if name.lower().endswith(ext):
+            name = name[:-len(ext)]
+            break
+    name = name.replace('_', ' ').replace('-', ' ')
+    
+    if href.startswith('http'):
+        download_url = href
+    else:
+        download_url = f"{url.rstrip('/')}/{href.lstrip('/')}"
+    
+    region = 'Unknown'
+    if any(x in name.upper() for x in ['(USA)', '[USA]', 'USA']):
+        region = 'USA'
+    elif any(x in name.upper() for x in ['(EUR)', '[EUR]', 'EUROPE', 'EUR']):
+        region = 'EUR'
+    elif any(x in name.upper() for x in ['(JPN)', '[JPN]', 'JAPAN', 'JPN']):
+        region = 'JPN'
+    
+    return {
+        'id': '',
+        'name': name.strip(),
+        'region': region,
+        'download_url': download_url,
+        'filename': original_name,
+        'type': original_name.split('.')[-1].upper()
+    }
+
+
+def synthetic_hrefs(count):
+    random.seed(1)
+    words = ["Mario", "Zelda", "Pokemon", "Kart", "Fire_Emblem", "Animal-Crossing",
+             "(USA)", "(EUR)", "[JPN]", "Europe", "Japan", "v1.2", "Rev_1"]
+    extensions = [".cia", ".3ds", ".3dsx", ".CIA"]
+    return [
+        "_".join(random.choice(words) for _ in range(random.randint(2, 6)))
+        + random.choice(extensions)
+        for _ in range(count)
+    ]
+
+
+def measure(label, build, hrefs):
+    url = "http://example.org/3ds"
+    start = time.perf_counter()
+    games = [build(href, url) for href in hrefs]
+    elapsed = time.perf_counter() - start
+    del games
+    
+    # Mémoire retenue par le catalogue (passe séparée : tracemalloc ralentit)
+    tracemalloc.start()
+    games = [build(href, url) for href in hrefs]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:14} {elapsed * 1000:7.0f} ms  {len(hrefs) / elapsed:9.0f} entries/s"
+          f"  {retained / 1024 ** 2:6.1f} MB")
+    return games
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    args = parser.parse_args()
+    
+    hrefs = synthetic_hrefs(args.entries)
+    print(f"{args.entries} index links")
+    measure("dict", build_remote_game_dict, hrefs)
+    measure("CatalogEntry", app.build_remote_game, hrefs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Mémoire et temps d'analyse d'un gros index distant : IndexLinkParser en flux
+contre BeautifulSoup sur la page entière (le comportement d'avant)
+
+    python benchmarks/bench_index_parser.py [--links 100000]
+
+BeautifulSoup (beautifulsoup4) n'est nécessaire que pour la mesure de référence.
+"""
+import argparse
+import functools
+import http.server
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import requests
+
+from _common import load_app
+
+app = load_app()
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def write_index(path, links):
+    """Page d'index façon Apache avec des colonnes de taille et de date"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<html><body><table>\n")
+        for i in range(links):
+            name = f"Game_{i:06d}_(USA).cia" if i % 10 else f"folder_{i}/"
+            f.write(f'<tr><td><a href="{name}">{name}</a></td>'
+                    f'<td>2024-01-01 12:00</td><td>{i * 1000}</td></tr>\n')
+        f.write("</table></body></html>\n")
+
+
+def parse_streaming(url):
+    response = requests.get(url, timeout=30, stream=True)
+    response.raise_for_status()
+    return sum(1 for _ in app.iter_index_games(response, url))
+
+
+def parse_soup(url):
+    from bs4 import BeautifulSoup
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, 'html.parser')
+    count = 0
+    for link in soup.find_all('a', href=True):
+        if link['href'].lower().endswith(app.GAME_EXTENSIONS):
+            count += 1
+    return count
+
+
+def measure(label, function, url):
+    # Deux passes : tracemalloc ralentit beaucoup l'analyse
+    start = time.perf_counter()
+    count = function(url)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:22} {count} games  {elapsed:6.2f} s  peak {peak / 1024 ** 2:7.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--links", type=int, default=100000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        write_index(os.path.join(directory, "index.html"), args.links)
+        size = os.path.getsize(os.path.join(directory, "index.html"))
+        handler = functools.partial(QuietHandler, directory=directory)
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/index.html"
+        print(f"index: {args.links} links, {size / 1024 ** 2:.1f} MB")
+        try:
+            try:
+                measure("BeautifulSoup", parse_soup, url)
+            except ImportError:
+                print("BeautifulSoup          (beautifulsoup4 not installed, skipped)")
+            measure("IndexLinkParser", parse_streaming, url)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Requêtes par seconde sur le serveur local : keep-alive HTTP/1.1 contre une
+connexion par requête (HTTP/1.0, le comportement d'avant)
+
+    python benchmarks/bench_keepalive.py [--requests 2000] [--size-kb 4]
+"""
+import argparse
+import http.client
+import os
+import tempfile
+import time
+
+from _common import load_app, start_server
+
+app = load_app()
+
+
+class Http10Handler(app.LocalServerHandler):
+    """Une connexion par requête"""
+    protocol_version = "HTTP/1.0"
+
+
+def run_keepalive(port, path, count):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    start = time.perf_counter()
+    for _ in range(count):
+        connection.request("GET", path)
+        connection.getresponse().read()
+    elapsed = time.perf_counter() - start
+    connection.close()
+    return elapsed
+
+
+def run_reconnect(port, path, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        connection.request("GET", path)
+        connection.getresponse().read()
+        connection.close()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--size-kb", type=int, default=4)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "small.3dsx"), "wb") as f:
+            f.write(os.urandom(args.size_kb * 1024))
+        
+        for label, handler, client in (
+            ("HTTP/1.0, new connection", Http10Handler, run_reconnect),
+            ("HTTP/1.1 keep-alive", app.LocalServerHandler, run_keepalive),
+        ):
+            server, port = start_server(app, directory, handler)
+            try:
+                elapsed = client(port, "/small.3dsx", args.requests)
+            finally:
+                server.shutdown()
+                server.server_close()
+            print(f"{label:26} {args.requests / elapsed:8.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
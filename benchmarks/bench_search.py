@@ -0,0 +1,77 @@
+"""Temps de recherche par frappe (SearchIndex.search) sur un gros catalogue
+
+Chaque requête est tapée lettre par lettre, comme dans la zone de recherche,
+puis effacée ; on mesure chaque appel. Code de sortie 1 si le p99 dépasse
+l'objectif.
+
+    python benchmarks/bench_search.py [--games 50000] [--target-ms 10]
+"""
+import argparse
+import random
+import sys
+import time
+
+from _common import load_app
+
+app = load_app()
+
+SERIES = ["Mario", "Zelda", "Pokemon", "Fire Emblem", "Animal Crossing", "Kirby",
+          "Metroid", "Donkey Kong", "Luigi's Mansion", "Professor Layton", "Monster Hunter",
+          "Bravely Default", "Kid Icarus", "Star Fox", "Yoshi", "Picross", "Harvest Moon"]
+WORDS = ["Kart", "Party", "Tennis", "Golf", "Adventure", "Chronicles", "Origins", "Dream",
+         "World", "Island", "Deluxe", "Ultimate", "Legends", "Quest", "Story", "Trilogy",
+         "Alpha", "Omega", "Sun", "Moon", "X", "Y", "3D", "Remix", "Edition"]
+REGIONS = ["USA", "EUR", "JPN", "Region Free", "Unknown"]
+QUERIES = ["mario kart", "zelda", "pokemon moon", "fire emblem", "kirby", "layton",
+           "monster hunter 4", "a", "e", "3d", "star", "usa", "cia", "deluxe"]
+
+
+def synthetic_catalog(count):
+    random.seed(1)
+    games = []
+    for index in range(count):
+        name = " ".join([random.choice(SERIES)] + random.sample(WORDS, random.randint(1, 3)))
+        if random.random() < 0.3:
+            name += f" {random.randint(2, 9)}"
+        file_type = random.choice(["CIA", "3DS", "3DSX"])
+        games.append(app.CatalogEntry(name, random.choice(REGIONS), file_type,
+                                      f"{name}.{file_type.lower()}", f"http://host/{index}"))
+    return sorted(games, key=lambda game: game.name)
+
+
+def keystrokes(queries):
+    """Requêtes successives : saisie lettre par lettre puis effacement"""
+    for query in queries:
+        for end in range(1, len(query) + 1):
+            yield query[:end]
+        for end in range(len(query) - 1, 0, -1):
+            yield query[:end]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=50000)
+    parser.add_argument("--target-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    games = synthetic_catalog(args.games)
+    start = time.perf_counter()
+    index = app.SearchIndex(games)
+    print(f"{args.games} games, index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    timings = []
+    for _ in range(3):
+        for query in keystrokes(QUERIES):
+            start = time.perf_counter()
+            index.search(query)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    p50 = timings[len(timings) // 2] * 1000
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000
+    print(f"{len(timings)} keystrokes  p50 {p50:.2f} ms  p99 {p99:.2f} ms"
+          f"  max {timings[-1] * 1000:.2f} ms  (target p99 {args.target_ms:g} ms)")
+    return 0 if p99 <= args.target_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Débit et CPU du serveur local : os.sendfile contre shutil.copyfileobj
+
+    python benchmarks/bench_sendfile.py [--size-mb 256] [--clients 4]
+
+Le CPU est mesuré dans le thread du serveur (time.thread_time) pour ne pas
+compter le client.
+"""
+import argparse
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+from _common import load_app, start_server
+
+app = load_app()
+
+
+class CopyfileobjHandler(app.LocalServerHandler):
+    """Envoi d'avant : copie par blocs en Python"""
+    def copyfile(self, source, outputfile):
+        shutil.copyfileobj(source, outputfile)
+
+
+def measure_cpu(handler_class, cpu):
+    class Measured(handler_class):
+        def copyfile(self, source, outputfile):
+            start = time.thread_time()
+            try:
+                super().copyfile(source, outputfile)
+            finally:
+                with cpu['lock']:
+                    cpu['seconds'] += time.thread_time() - start
+    return Measured
+
+
+def download(port, name, buffer):
+    """Télécharge un fichier en jetant les octets ; retourne le nombre reçu"""
+    with socket.create_connection(("127.0.0.1", port)) as sock:
+        sock.sendall(f"GET /{name} HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n".encode())
+        received = 0
+        while True:
+            n = sock.recv_into(buffer)
+            if not n:
+                return received
+            received += n
+
+
+def run(label, handler_class, directory, name, clients):
+    cpu = {'seconds': 0.0, 'lock': threading.Lock()}
+    server, port = start_server(app, directory, measure_cpu(handler_class, cpu), max_workers=clients)
+    try:
+        threads = []
+        totals = [0] * clients
+        start = time.perf_counter()
+        for i in range(clients):
+            def worker(i=i):
+                totals[i] = download(port, name, bytearray(1024 * 1024))
+            threads.append(threading.Thread(target=worker))
+            threads[-1].start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+    total = sum(totals)
+    print(f"{label:12} {total / elapsed / 1024 ** 2:8.0f} MB/s"
+          f"   server CPU {cpu['seconds']:.2f} s ({cpu['seconds'] / (total / 1024 ** 3):.2f} s/GB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--clients", type=int, default=4)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        name = "bench.cia"
+        with open(os.path.join(directory, name), "wb") as f:
+            block = os.urandom(1024 * 1024)
+            for _ in range(args.size_mb):
+                f.write(block)
+        print(f"{args.clients} client(s) x {args.size_mb} MB")
+        run("copyfileobj", CopyfileobjHandler, directory, name, args.clients)
+        run("sendfile" if hasattr(os, "sendfile") else "mmap", app.LocalServerHandler,
+            directory, name, args.clients)
+
+
+if __name__ == "__main__":
+    main()
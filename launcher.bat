@@ -13,7 +13,7 @@ if not exist ".installed" (
     echo.
     
     python -m pip install --upgrade pip --quiet
-    pip install qrcode pillow requests beautifulsoup4 --quiet
+    pip install qrcode pillow requests --quiet
     
     if %errorlevel% equ 0 (
         echo. > .installed
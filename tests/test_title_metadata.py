@@ -0,0 +1,75 @@
+"""Lecture des métadonnées d'un CIA (TMD signé en SHA-1 ou SHA-256, SMDH)"""
+import importlib.util
+import os
+import struct
+
+import pytest
+
+MODULE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "3ds_qr_generator.py")
+spec = importlib.util.spec_from_file_location("qr_generator", MODULE_PATH)
+qr_generator = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(qr_generator)
+
+TITLE_ID = 0x00040000001B5000
+
+def align64(data):
+    return data + bytes(-len(data) % 64)
+
+def build_smdh(title, region_flags):
+    smdh = bytearray(0x2020)
+    smdh[:4] = b'SMDH'
+    encoded = title.encode('utf-16-le')
+    smdh[0x208:0x208 + len(encoded)] = encoded
+    smdh[0x2018:0x201C] = region_flags.to_bytes(4, 'little')
+    return bytes(smdh)
+
+def build_cia(signature_type, signature_size, title="Pokemon Sun", version=1040):
+    """CIA minimal : en-tête, certificats et ticket vides, TMD, contenu chiffré, meta"""
+    tmd = bytearray(4 + signature_size + 0xC4 + 0x30)
+    tmd[0:4] = signature_type.to_bytes(4, 'big')
+    body = 4 + signature_size
+    tmd[body + 0x4C:body + 0x54] = TITLE_ID.to_bytes(8, 'big')
+    tmd[body + 0x9C:body + 0x9E] = version.to_bytes(2, 'big')
+    content = bytes(0x200)
+    meta = bytes(0x400) + build_smdh(title, 0x02)
+    cert, ticket = bytes(0xA00), bytes(0x350)
+    header = struct.pack('<IHHIIIIQ', 0x2020, 0, 0, len(cert), len(ticket), len(tmd), len(meta), len(content))
+
+    data = align64(header + bytes(0x2000))
+    for part in (cert, ticket, bytes(tmd), content):
+        data = align64(data + part)
+    return data + meta
+
+@pytest.mark.parametrize("signature_type, signature_size", [
+    (0x10001, 0x13C),  # RSA-2048 SHA-1
+    (0x10004, 0x13C),  # RSA-2048 SHA-256
+    (0x10003, 0x23C),  # RSA-4096 SHA-256
+    (0x10005, 0x7C),   # ECDSA SHA-256
+])
+def test_cia_tmd_signature_types(tmp_path, signature_type, signature_size):
+    path = tmp_path / "game.cia"
+    path.write_bytes(build_cia(signature_type, signature_size))
+
+    info = qr_generator.read_title_metadata(str(path))
+
+    assert info['title_id'] == f"{TITLE_ID:016X}"
+    assert info['version'] == 1040
+    assert info['title'] == "Pokemon Sun"
+    assert info['region'] == "USA"
+
+def test_cia_unknown_signature_type(tmp_path):
+    path = tmp_path / "game.cia"
+    path.write_bytes(build_cia(0x20000, 0x13C))
+
+    assert qr_generator.read_title_metadata(str(path)) == {}
+
+def test_title_reaches_catalog_entry(tmp_path):
+    path = tmp_path / "Pokemon Sun (USA).cia"
+    path.write_bytes(build_cia(0x10004, 0x13C))
+
+    game = qr_generator.build_local_game(path.name, "http://host", qr_generator.read_title_metadata(str(path)))
+
+    assert game.title == "Pokemon Sun"
+    assert qr_generator.CatalogEntry.from_row(game.to_row()).title == "Pokemon Sun"
+    # Ligne d'un cache plus ancien, sans le titre
+    assert qr_generator.CatalogEntry.from_row(game.to_row()[:-1]).title is None